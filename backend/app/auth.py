@@ -1,4 +1,6 @@
 import os
+import threading
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -6,10 +8,13 @@ import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Request
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 
-from .database import get_db
+from .cache import TTLCache
+from .database import get_async_read_db, get_read_db
+from .hashing import pwd_context
 from . import models
 
 
@@ -17,10 +22,79 @@ SECRET_KEY = os.environ.get("CT_SECRET_KEY", "dev-secret-change-me")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("CT_ACCESS_EXPIRE_MIN", "60"))
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
+@dataclass(frozen=True)
+class AuthUser:
+    """Immutable snapshot of a ``User`` row, safe to share across requests and threads.
+
+    This is what the auth dependencies return; it carries everything routes
+    read from the caller (``id``, ``username``, ``email``, ``role``) but not the
+    password hash.
+    """
+
+    id: int
+    username: str
+    email: str
+    role: str
+
+    @classmethod
+    def from_model(cls, user: models.User) -> "AuthUser":
+        return cls(id=user.id, username=user.username, email=user.email, role=user.role or "user")
+
+
+# Users resolved from tokens, keyed by the ``sub`` claim. ORM writes to a user drop
+# its entry on commit (see below); the TTL bounds staleness for writes made by
+# other worker processes.
+user_cache = TTLCache(
+    maxsize=int(os.environ.get("CT_USER_CACHE_SIZE", "1024")),
+    ttl=float(os.environ.get("CT_USER_CACHE_TTL", "60")),
+)
+
+_PENDING_USERS = "auth_user_cache_pending"
+
+# Bumped on every invalidation. A lookup that read the row before a bump
+# does not cache it: it may be the old row, read just before the commit.
+_user_generation = 0
+_user_generation_lock = threading.Lock()
+
+
+def _drop_users(names) -> None:
+    global _user_generation
+    with _user_generation_lock:
+        _user_generation += 1
+        for name in names:
+            user_cache.delete(name)
+
+
+def _user_changed(mapper, connection, target) -> None:
+    names = {target.username}
+    names.update(inspect(target).attrs.username.history.deleted or ())
+    session = object_session(target)
+    if session is None:
+        _drop_users(names)
+        return
+    # Invalidate after commit: before it, a concurrent lookup would still read the old row
+    session.info.setdefault(_PENDING_USERS, set()).update(names)
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(models.User, _event, _user_changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_changed_users(session) -> None:
+    names = session.info.pop(_PENDING_USERS, ())
+    if names:
+        _drop_users(names)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session) -> None:
+    session.info.pop(_PENDING_USERS, None)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -29,51 +103,119 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, user=None) -> str:
+    """Sign ``data``; with ``user`` (anything with ``username``, ``id``, ``role``) add its claims."""
     to_encode = data.copy()
+    if user is not None:
+        to_encode.update({"sub": user.username, "user_id": user.id, "role": user.role})
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> models.User:
-    credentials_exception = HTTPException(
+def _decode_token(token: str) -> Optional[dict]:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+    return payload if payload.get("sub") else None
+
+
+def _bearer_token(request: Request) -> Optional[str]:
+    auth = request.headers.get("Authorization")
+    if not auth or not auth.lower().startswith("bearer "):
+        return None
+    return auth.split(" ", 1)[1].strip()
+
+
+def _matches_token(user: Optional[AuthUser], payload: dict) -> bool:
+    # A user_id claim pins the token to one account: if the username was deleted
+    # and registered again, old tokens stop working. The role claim is informational;
+    # authorization always uses the current (cached) row.
+    claimed = payload.get("user_id")
+    return user is not None and (claimed is None or claimed == user.id)
+
+
+def _cache_user(user: Optional[models.User], generation: int) -> Optional[AuthUser]:
+    """Snapshot ``user``; cache it unless an invalidation ran since ``generation`` was read."""
+    if user is None:
+        return None
+    snapshot = AuthUser.from_model(user)
+    with _user_generation_lock:
+        if generation == _user_generation:
+            user_cache.set(snapshot.username, snapshot)
+    return snapshot
+
+
+def resolve_user(db: Session, payload: dict) -> Optional[AuthUser]:
+    """User for a decoded token, from the cache or - on a miss - the database."""
+    username = payload["sub"]
+    user = user_cache.get(username)
+    if user is None:
+        generation = _user_generation
+        user = _cache_user(db.query(models.User).filter(models.User.username == username).first(), generation)
+    return user if _matches_token(user, payload) else None
+
+
+async def resolve_user_async(db: AsyncSession, payload: dict) -> Optional[AuthUser]:
+    username = payload["sub"]
+    user = user_cache.get(username)
+    if user is None:
+        generation = _user_generation
+        row = (await db.execute(select(models.User).where(models.User.username == username))).scalars().first()
+        user = _cache_user(row, generation)
+    return user if _matches_token(user, payload) else None
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except jwt.PyJWTError:
-        raise credentials_exception
 
-    user = db.query(models.User).filter(models.User.username == username).first()
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)) -> AuthUser:
+    payload = _decode_token(token)
+    user = resolve_user(db, payload) if payload else None
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
 
-def get_optional_user(request: Request, db: Session = Depends(get_db)) -> Optional[models.User]:
+def get_optional_user(request: Request, db: Session = Depends(get_read_db)) -> Optional[AuthUser]:
     """Return user if bearer token present, otherwise None without raising."""
-    auth = request.headers.get("Authorization")
-    if not auth or not auth.lower().startswith("bearer "):
-        return None
-    token = auth.split(" ", 1)[1].strip()
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if not username:
-            return None
-        return db.query(models.User).filter(models.User.username == username).first()
-    except Exception:
-        return None
+    token = _bearer_token(request)
+    payload = _decode_token(token) if token else None
+    return resolve_user(db, payload) if payload else None
+
+
+def require_admin(current_user: AuthUser = Depends(get_current_user)) -> AuthUser:
+    if getattr(current_user, "role", "user") != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
+    return current_user
+
+
+# Async counterparts used by the routers in routers/aio (CT_DB_ASYNC=1)
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_read_db)
+) -> AuthUser:
+    payload = _decode_token(token)
+    user = await resolve_user_async(db, payload) if payload else None
+    if user is None:
+        raise _credentials_exception()
+    return user
+
+
+async def get_optional_user_async(request: Request, db: AsyncSession = Depends(get_async_read_db)) -> Optional[AuthUser]:
+    token = _bearer_token(request)
+    payload = _decode_token(token) if token else None
+    return await resolve_user_async(db, payload) if payload else None
 
 
-def require_admin(current_user: models.User = Depends(get_current_user)) -> models.User:
+async def require_admin_async(current_user: AuthUser = Depends(get_current_user_async)) -> AuthUser:
     if getattr(current_user, "role", "user") != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
     return current_user
@@ -0,0 +1,334 @@
+"""Streaming bulk import and export of places, comments and contact messages as NDJSON or CSV."""
+import codecs
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .database import DB_PROFILE
+
+
+FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+CHUNK_SIZE = int(os.environ.get("CT_IMPORT_CHUNK", "1000"))
+MAX_REPORTED_ERRORS = 1000
+EXPORT_BATCH = 1000
+EXPORT_FLUSH_BYTES = 64 * 1024
+
+UPSERT_KEYS = ("name", "external_id")
+PLACE_FIELDS = ("external_id", "name", "description", "latitude", "longitude", "image_url")
+PLACE_EXPORT_COLUMNS = ("id", *PLACE_FIELDS, "created_by", "likes", "dislikes")
+CONTACT_EXPORT_COLUMNS = ("id", "name", "email", "message", "created_at")
+COMMENT_EXPORT_COLUMNS = ("id", "place_id", "author", "content", "created_at")
+# Empty CSV cells mean "no value" only for optional columns
+_CSV_OPTIONAL = frozenset({"external_id", "image_url"})
+
+
+def resolve_format(fmt: Optional[str], filename: Optional[str] = None) -> str:
+    """Explicit ``fmt``, else the file extension; NDJSON by default."""
+    if not fmt and filename:
+        ext = os.path.splitext(filename)[1].lower().lstrip(".")
+        fmt = {"jsonl": "ndjson", "json": "ndjson"}.get(ext, ext)
+    fmt = (fmt or "ndjson").lower()
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(FORMATS)}")
+    return fmt
+
+
+def _decoded_lines(stream: BinaryIO, bad: set[int]) -> Iterator[str]:
+    """UTF-8 lines of ``stream``; numbers of lines that don't decode go to ``bad``."""
+    for line_no, raw in enumerate(stream, 1):
+        if line_no == 1 and raw.startswith(codecs.BOM_UTF8):
+            raw = raw[len(codecs.BOM_UTF8):]
+        try:
+            yield raw.decode("utf-8")
+        except UnicodeDecodeError:
+            bad.add(line_no)
+            # Keeps the line structure for the CSV reader; the row is reported, not imported
+            yield raw.decode("utf-8", errors="replace")
+
+
+def iter_records(stream: BinaryIO, fmt: str) -> Iterator[tuple[int, Any]]:
+    """Yield ``(line, record)`` from an NDJSON or CSV byte stream.
+
+    ``record`` is a dict, or a ``ValueError`` for a line that can't be parsed
+    (including one that is not valid UTF-8).
+    """
+    bad: set[int] = set()
+    lines = _decoded_lines(stream, bad)
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        if reader.fieldnames is not None and 1 in bad:
+            raise HTTPException(status_code=400, detail="CSV header is not valid UTF-8")
+        last = reader.line_num
+        for row in reader:
+            # A quoted field can span lines: the row covers (last, line_num]
+            if any(n in bad for n in range(last + 1, reader.line_num + 1)):
+                yield reader.line_num, ValueError("not valid UTF-8")
+            else:
+                yield reader.line_num, {
+                    k: (None if v == "" and k in _CSV_OPTIONAL else v) for k, v in row.items() if k
+                }
+            last = reader.line_num
+        return
+    for line_no, line in enumerate(lines, 1):
+        if line_no in bad:
+            yield line_no, ValueError("not valid UTF-8")
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_no, ValueError(f"invalid JSON: {exc}")
+            continue
+        yield line_no, record if isinstance(record, dict) else ValueError("expected a JSON object")
+
+
+def _error_message(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(f"{'.'.join(str(p) for p in e['loc']) or 'row'}: {e['msg']}" for e in exc.errors())
+    return str(exc)
+
+
+class ImportReport:
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self.processed = self.inserted = self.updated = self.superseded = self.failed = 0
+        self.errors: list[dict] = []
+
+    def fail(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "superseded": self.superseded,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "dry_run": self.dry_run,
+        }
+
+
+def import_places(
+    db: Session,
+    records: Iterable[tuple[int, Any]],
+    upsert: Optional[str] = None,
+    created_by: Optional[int] = None,
+    dry_run: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> dict:
+    """Validate and write places from ``iter_records`` output; commit unless ``dry_run``.
+
+    With ``upsert`` (``"name"`` or ``"external_id"``) rows whose key already
+    exists update those places instead of adding new ones; within one file
+    the last row for a key wins and the earlier ones count as ``superseded``.
+    """
+    if upsert is not None and upsert not in UPSERT_KEYS:
+        raise HTTPException(status_code=400, detail=f"upsert must be one of: {', '.join(UPSERT_KEYS)}")
+    report = ImportReport(dry_run)
+    chunk: list[tuple[int, dict]] = []
+    try:
+        if DB_PROFILE == "legacy":
+            # pysqlite opens a transaction only before DML; a chunk's SAVEPOINT
+            # would start its own, and RELEASE would commit it
+            db.connection().exec_driver_sql("BEGIN")
+        for line, record in records:
+            report.processed += 1
+            if isinstance(record, Exception):
+                report.fail(line, str(record))
+                continue
+            try:
+                row = schemas.PlaceCreate.model_validate(record).model_dump(include=set(PLACE_FIELDS))
+            except ValidationError as exc:
+                report.fail(line, _error_message(exc))
+                continue
+            chunk.append((line, row))
+            if len(chunk) >= chunk_size:
+                _write_chunk(db, chunk, upsert, created_by, report)
+                chunk = []
+        if chunk:
+            _write_chunk(db, chunk, upsert, created_by, report)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    return report.as_dict()
+
+
+def _existing_keys(db: Session, column, keys: set) -> dict:
+    """``{key: number of places with it}`` for the ``keys`` present in the table."""
+    if not keys:
+        return {}
+    return dict(db.execute(select(column, func.count()).where(column.in_(keys)).group_by(column)).all())
+
+
+def _write_chunk(db: Session, chunk: list[tuple[int, dict]], upsert: Optional[str], created_by: Optional[int],
+                 report: ImportReport) -> None:
+    table = models.Place.__table__
+    existing: dict = {}
+    if upsert:
+        existing = _existing_keys(db, table.c[upsert], {row[upsert] for _, row in chunk if row[upsert] is not None})
+    # external_id is unique: report clashes per row instead of failing the batch.
+    # ext -> name of the place holding it (in the table, or claimed earlier in this chunk)
+    owners: dict = {}
+    if upsert != "external_id":
+        exts = {row["external_id"] for _, row in chunk if row["external_id"]}
+        if exts:
+            owners = dict(db.execute(select(table.c.external_id, table.c.name).where(table.c.external_id.in_(exts))).all())
+
+    plain: list[tuple[int, dict]] = []
+    inserts: dict[Any, tuple[int, dict]] = {}  # key -> (line, row), so a repeated key is written once
+    updates: dict[Any, tuple[int, dict]] = {}
+    for line, row in chunk:
+        key = row[upsert] if upsert else None
+        if existing.get(key, 0) > 1:
+            # Names are not unique; updating them all would be a guess
+            report.fail(line, f"{upsert} matches {existing[key]} places")
+            continue
+        ext = row["external_id"]
+        if ext and upsert != "external_id":
+            # Only an upsert by name may keep the external_id its own place already has
+            if ext in owners and not (upsert == "name" and owners[ext] == key):
+                report.fail(line, f"external_id {ext!r} already exists")
+                continue
+            owners[ext] = key
+        if key is None:
+            plain.append((line, row))
+            continue
+        target = updates if key in existing else inserts
+        if key in target:
+            # The earlier row for this key is replaced by this one and never written
+            report.superseded += 1
+        target[key] = (line, row)
+
+    new_rows = [*plain, *inserts.values()]
+    try:
+        with db.begin_nested():
+            _insert_rows(db, [row for _, row in new_rows], created_by)
+            _update_rows(db, upsert, [(key, row) for key, (_, row) in updates.items()])
+    except IntegrityError:
+        # A constraint the checks above did not foresee: find the offending rows
+        for line, row in new_rows:
+            if _write_row(db, line, report, lambda: _insert_rows(db, [row], created_by)):
+                report.inserted += 1
+        for key, (line, row) in updates.items():
+            if _write_row(db, line, report, lambda: _update_rows(db, upsert, [(key, row)])):
+                report.updated += 1
+        return
+    report.inserted += len(new_rows)
+    report.updated += len(updates)
+
+
+def _write_row(db: Session, line: int, report: ImportReport, write: Callable[[], None]) -> bool:
+    try:
+        with db.begin_nested():
+            write()
+    except IntegrityError as exc:
+        report.fail(line, str(exc.orig))
+        return False
+    return True
+
+
+def _insert_rows(db: Session, rows: list[dict], created_by: Optional[int]) -> None:
+    if rows:
+        db.execute(insert(models.Place.__table__), [{**row, "created_by": created_by} for row in rows])
+
+
+def _update_rows(db: Session, upsert: Optional[str], rows: list[tuple[Any, dict]]) -> None:
+    if not rows:
+        return
+    table = models.Place.__table__
+    fields = [f for f in PLACE_FIELDS if f != upsert]
+    values = {f: bindparam(f"v_{f}") for f in fields}
+    if "external_id" in values:
+        # A row without an external_id keeps the one the place already has
+        values["external_id"] = func.coalesce(values["external_id"], table.c.external_id)
+    stmt = update(table).where(table.c[upsert] == bindparam("k")).values(values)
+    db.execute(stmt, [{"k": key, **{f"v_{f}": row[f] for f in fields}} for key, row in rows])
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def stream_rows(session_factory: Callable[[], Session], stmt, columns: Iterable[str], fmt: str) -> Iterator[bytes]:
+    """Encode the rows of ``stmt`` as NDJSON or CSV, in chunks of about 64 KiB.
+
+    The generator opens its own session: it runs after the request's
+    dependencies have been closed.
+    """
+    columns = list(columns)
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n") if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(columns)
+    db = session_factory()
+    try:
+        for row in db.execute(stmt.execution_options(yield_per=EXPORT_BATCH)):
+            if writer is not None:
+                writer.writerow(["" if v is None else v.isoformat() if isinstance(v, (datetime, date)) else v for v in row])
+            else:
+                buf.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default))
+                buf.write("\n")
+            if buf.tell() >= EXPORT_FLUSH_BYTES:
+                yield buf.getvalue().encode()
+                buf.seek(0)
+                buf.truncate()
+    finally:
+        db.close()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+def export_statement(model, columns: Iterable[str], since: Optional[datetime] = None,
+                     until: Optional[datetime] = None, **equals):
+    """``SELECT columns FROM model`` in id order, optionally within ``[since, until)`` on ``created_at``.
+
+    Ordering by the rowid keeps the plan a plain table scan with no sort step
+    (temp_store is memory), so the export streams whatever range is asked for.
+    """
+    table = model.__table__
+    stmt = select(*(table.c[c] for c in columns))
+    # created_at is text ('YYYY-MM-DD HH:MM:SS'), while a bound datetime would
+    # be bound with microseconds; compare both sides in SQLite's own format
+    if since is not None:
+        stmt = stmt.where(func.datetime(table.c.created_at) >= _sqlite_datetime(since))
+    if until is not None:
+        stmt = stmt.where(func.datetime(table.c.created_at) < _sqlite_datetime(until))
+    for name, value in equals.items():
+        if value is not None:
+            stmt = stmt.where(table.c[name] == value)
+    return stmt.order_by(table.c.id)
+
+
+def _sqlite_datetime(value: datetime) -> str:
+    """``value`` as naive UTC text in whole seconds, rounded up.
+
+    Stored timestamps have whole seconds, so rounding the bound up keeps
+    ``>= since`` and ``< until`` exact for sub-second bounds.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    if value.microsecond:
+        value = value.replace(microsecond=0) + timedelta(seconds=1)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
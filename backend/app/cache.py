@@ -0,0 +1,154 @@
+"""In-process TTL/LRU caches with tag-based invalidation."""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from .versions import Conditional
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 512, ttl: float = 300.0, max_bytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, tuple[float, Any, int, tuple[str, ...]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= now:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, size: int = 0, tags: Iterable[str] = ()) -> None:
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + self.ttl, value, size, tuple(tags))
+            self._bytes += size
+            while self._data and (
+                len(self._data) > self.maxsize or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def invalidate(self, *tags: str) -> None:
+        """Drop every entry carrying any of ``tags``."""
+        wanted = set(tags)
+        with self._lock:
+            stale = [key for key, entry in self._data.items() if wanted.intersection(entry[3])]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.maxsize,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._data.pop(key)
+        self._bytes -= entry[2]
+
+
+class NullCache(TTLCache):
+    """Drop-in replacement that never stores anything."""
+
+    def __init__(self):
+        super().__init__(maxsize=0, ttl=0)
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: Any, size: int = 0, tags: Iterable[str] = ()) -> None:
+        return None
+
+
+def _build_response_cache() -> TTLCache:
+    if os.environ.get("CT_RESPONSE_CACHE", "memory").lower() in ("off", "none", "0", "false"):
+        return NullCache()
+    return TTLCache(
+        maxsize=int(os.environ.get("CT_RESPONSE_CACHE_SIZE", "512")),
+        ttl=float(os.environ.get("CT_RESPONSE_CACHE_TTL", "300")),
+        max_bytes=int(os.environ.get("CT_RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024))),
+    )
+
+
+response_cache = _build_response_cache()
+
+
+def cached_response(cond: Conditional) -> Optional[Response]:
+    """Return the cached body for this request's ETag, if any."""
+    entry = response_cache.get(cond.etag)
+    if entry is None:
+        return None
+    body, headers = entry
+    return Response(content=body, media_type="application/json", headers={**headers, **cond.headers})
+
+
+def store_response(
+    cond: Conditional,
+    tags: Iterable[str],
+    adapter: TypeAdapter,
+    data: Any,
+    headers: Optional[dict[str, str]] = None,
+) -> Response:
+    """Serialize ``data`` through ``adapter``, cache the bytes and return them as a response."""
+    return store_body(cond, tags, adapter.dump_json(adapter.validate_python(data, from_attributes=True)), headers)
+
+
+def store_body(
+    cond: Conditional,
+    tags: Iterable[str],
+    body: bytes,
+    headers: Optional[dict[str, str]] = None,
+) -> Response:
+    """Cache an already encoded JSON ``body`` and return it as a response."""
+    extra = {k: v for k, v in (headers or {}).items() if v}
+    response_cache.set(cond.etag, (body, extra), size=len(body), tags=tags)
+    return Response(content=body, media_type="application/json", headers={**extra, **cond.headers})
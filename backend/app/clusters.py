@@ -0,0 +1,145 @@
+"""Map marker clustering on a per-zoom grid of cells kept up to date by triggers."""
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from . import models
+from .geo import filter_bbox
+
+
+MAX_CLUSTER_ZOOM = 16
+CELLS_PER_TILE = 4
+# Guards against world-sized boxes at street-level zooms
+MAX_CELLS_PER_AXIS = 256
+MAX_POINTS = 2000
+
+
+def cell_size(zoom: int) -> float:
+    return 360.0 / (1 << zoom) / CELLS_PER_TILE
+
+
+def _cell(new_or_old: str) -> str:
+    # Coordinates are shifted to be positive, so CAST truncation is floor()
+    return (
+        f"CAST(({new_or_old}.longitude + 180.0) / g.cell AS INTEGER), "
+        f"CAST(({new_or_old}.latitude + 90.0) / g.cell AS INTEGER)"
+    )
+
+
+def _add(row: str) -> str:
+    return f"""INSERT INTO place_clusters (zoom, cx, cy, n, sum_lat, sum_lon, sum_id)
+            SELECT g.zoom, {_cell(row)}, 1, {row}.latitude, {row}.longitude, {row}.id FROM cluster_grid g WHERE 1
+            ON CONFLICT (zoom, cx, cy) DO UPDATE SET
+                n = n + 1, sum_lat = sum_lat + excluded.sum_lat,
+                sum_lon = sum_lon + excluded.sum_lon, sum_id = sum_id + excluded.sum_id;"""
+
+
+def _remove(row: str) -> str:
+    cells = f"SELECT g.zoom, {_cell(row)} FROM cluster_grid g"
+    return f"""UPDATE place_clusters SET
+                n = n - 1, sum_lat = sum_lat - {row}.latitude,
+                sum_lon = sum_lon - {row}.longitude, sum_id = sum_id - {row}.id
+            WHERE (zoom, cx, cy) IN ({cells});
+            DELETE FROM place_clusters WHERE (zoom, cx, cy) IN ({cells}) AND n <= 0;"""
+
+
+def _create_statements() -> list[str]:
+    return [
+        "CREATE TABLE IF NOT EXISTS cluster_grid (zoom INTEGER PRIMARY KEY, cell REAL NOT NULL)",
+        """CREATE TABLE IF NOT EXISTS place_clusters (
+            zoom INTEGER NOT NULL,
+            cx INTEGER NOT NULL,
+            cy INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            sum_lat REAL NOT NULL,
+            sum_lon REAL NOT NULL,
+            sum_id INTEGER NOT NULL,
+            PRIMARY KEY (zoom, cx, cy)
+        ) WITHOUT ROWID""",
+        *(
+            f"INSERT OR IGNORE INTO cluster_grid (zoom, cell) VALUES ({z}, {cell_size(z)!r})"
+            for z in range(MAX_CLUSTER_ZOOM + 1)
+        ),
+        f"""CREATE TRIGGER IF NOT EXISTS places_clusters_ai AFTER INSERT ON places BEGIN
+            {_add("new")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS places_clusters_au AFTER UPDATE OF latitude, longitude ON places BEGIN
+            {_remove("old")}
+            {_add("new")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS places_clusters_ad AFTER DELETE ON places BEGIN
+            {_remove("old")}
+        END""",
+    ]
+
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM place_clusters",
+    f"""INSERT INTO place_clusters (zoom, cx, cy, n, sum_lat, sum_lon, sum_id)
+        SELECT g.zoom, {_cell("p")}, count(*), sum(p.latitude), sum(p.longitude), sum(p.id)
+        FROM places p, cluster_grid g
+        GROUP BY 1, 2, 3""",
+]
+
+
+def setup_index(conn) -> None:
+    """Create the grid table and triggers; fill the grid on first creation."""
+    existed = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'place_clusters'"
+    ).first() is not None
+    for stmt in _create_statements():
+        conn.exec_driver_sql(stmt)
+    if not existed:
+        for stmt in REBUILD_STATEMENTS:
+            conn.exec_driver_sql(stmt)
+
+
+def rebuild_index(db: Session) -> None:
+    """Recompute the grid from ``places``. Commits."""
+    for stmt in REBUILD_STATEMENTS:
+        db.execute(text(stmt))
+    db.commit()
+
+
+def _cell_range(lo: float, hi: float, offset: float, cell: float) -> tuple[int, int]:
+    # Same arithmetic as the triggers, so boundary points land in the same cell
+    return int((lo + offset) / cell), int((hi + offset) / cell)
+
+
+def clusters_in_bbox(db: Session, bbox: tuple[float, float, float, float], zoom: int) -> dict:
+    """``{"zoom", "clusters": [{latitude, longitude, count}], "points": [rows]}`` for a viewport."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    point_cols = (models.Place.id, models.Place.name, models.Place.latitude, models.Place.longitude)
+    if zoom > MAX_CLUSTER_ZOOM:
+        rows = filter_bbox(db.query(*point_cols), bbox).order_by(models.Place.id).limit(MAX_POINTS).all()
+        return {"zoom": zoom, "clusters": [], "points": rows}
+
+    cell = cell_size(zoom)
+    if min_lon <= max_lon:
+        x_ranges = [_cell_range(min_lon, max_lon, 180.0, cell)]
+    else:
+        # Crosses the antimeridian
+        x_ranges = [_cell_range(min_lon, 180.0, 180.0, cell), _cell_range(-180.0, max_lon, 180.0, cell)]
+    y_lo, y_hi = _cell_range(min_lat, max_lat, 90.0, cell)
+    if y_hi - y_lo + 1 > MAX_CELLS_PER_AXIS or sum(hi - lo + 1 for lo, hi in x_ranges) > MAX_CELLS_PER_AXIS:
+        raise HTTPException(status_code=400, detail="bbox is too large for this zoom")
+
+    cells = []
+    for x_lo, x_hi in x_ranges:
+        cells += db.execute(
+            text(
+                "SELECT n, sum_lat, sum_lon, sum_id FROM place_clusters "
+                "WHERE zoom = :zoom AND cx BETWEEN :x_lo AND :x_hi AND cy BETWEEN :y_lo AND :y_hi "
+                "ORDER BY cx, cy"
+            ),
+            {"zoom": zoom, "x_lo": x_lo, "x_hi": x_hi, "y_lo": y_lo, "y_hi": y_hi},
+        ).all()
+    clusters = [
+        {"latitude": sum_lat / n, "longitude": sum_lon / n, "count": n}
+        for n, sum_lat, sum_lon, _ in cells if n > 1
+    ]
+    single_ids = [sum_id for n, _, _, sum_id in cells if n == 1]
+    points = []
+    if single_ids:
+        points = db.query(*point_cols).filter(models.Place.id.in_(single_ids)).order_by(models.Place.id).all()
+    return {"zoom": zoom, "clusters": clusters, "points": points}
@@ -0,0 +1,172 @@
+"""Gzip/brotli response compression negotiated from ``Accept-Encoding``."""
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from .cache import NullCache, TTLCache
+from .versions import SCOPE_ETAG_KEY
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+MIN_BYTES = int(os.environ.get("CT_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("CT_COMPRESS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("CT_COMPRESS_BROTLI_QUALITY", "5"))
+CACHE_BYTES = int(os.environ.get("CT_COMPRESS_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+_COMPRESSIBLE = ("application/json", "application/x-ndjson", "application/javascript", "image/svg+xml", "text/")
+
+
+def enabled() -> bool:
+    return os.environ.get("CT_COMPRESSION", "on").lower() not in ("off", "none", "0", "false")
+
+
+def _build_cache() -> TTLCache:
+    if CACHE_BYTES <= 0:
+        return NullCache()
+    return TTLCache(maxsize=4096, ttl=3600.0, max_bytes=CACHE_BYTES)
+
+
+compressed_cache = _build_cache()
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """``"br"``, ``"gzip"`` or None for an ``Accept-Encoding`` header value."""
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+    star = accepted.get("*", 0.0)
+    candidates = (("br", "gzip") if brotli is not None else ("gzip",))
+    scored = [(accepted.get(c, star), c) for c in candidates]
+    # Highest q wins; on a tie, the order above (brotli first)
+    best_q = max((q for q, _ in scored), default=0.0)
+    if best_q <= 0:
+        return None
+    return next(c for q, c in scored if q == best_q)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # wbits 16+: gzip container
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._chunk, self._finish = self._c.process, self._c.finish
+        else:
+            self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._chunk, self._finish = self._c.compress, self._c.flush
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._chunk(data)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+def _conditional_etag(scope) -> Optional[str]:
+    return (scope.get("state") or {}).get(SCOPE_ETAG_KEY)
+
+
+def _compressible(headers: Headers) -> bool:
+    return headers.get("content-type", "").lower().startswith(_COMPRESSIBLE)
+
+
+class CompressionMiddleware:
+    """Pure ASGI: buffers only the first body message to decide."""
+
+    def __init__(self, app, minimum_size: int = MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        start: Optional[dict] = None
+        stream: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, stream, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] < 200 or message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not _compressible(headers)
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                # Wait for the first body message to know the size
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if start is not None:
+                response_start, start = start, None
+                headers = MutableHeaders(raw=response_start["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                if encoding is None or (not more and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(response_start)
+                    await send(message)
+                    return
+                etag = headers.get("etag")
+                headers["content-encoding"] = encoding
+                if etag and not etag.startswith("W/"):
+                    headers["etag"] = "W/" + etag
+                if not more:
+                    cacheable = response_start["status"] == 200 and etag is not None and etag == _conditional_etag(scope)
+                    body = self._compress_once(body, encoding, etag if cacheable else None)
+                    headers["content-length"] = str(len(body))
+                    await send(response_start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                del headers["content-length"]
+                stream = _StreamCompressor(encoding)
+                await send(response_start)
+            if stream is None:
+                await send(message)
+                return
+            data = stream.chunk(body) if body else b""
+            if not more:
+                data += stream.finish()
+            if data or not more:
+                await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _compress_once(self, body: bytes, encoding: str, etag: Optional[str]) -> bytes:
+        if etag is None:
+            return compress(body, encoding)
+        key = (etag, encoding)
+        cached = compressed_cache.get(key)
+        if cached is not None:
+            return cached
+        data = compress(body, encoding)
+        compressed_cache.set(key, data, size=len(data))
+        return data
@@ -1,27 +1,196 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, event
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from fastapi import Request
 import os
 
 
 DB_PATH = os.environ.get("CT_DB_PATH", os.path.join(os.path.dirname(__file__), "ct_travel.db"))
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DB_PATH}"
 
+# Storage profile:
+# - "production" (default): WAL journal, synchronous=NORMAL (CT_DB_SYNCHRONOUS), busy timeout,
+#   mmap/cache tuning, a pooled read-only engine for GET requests and a
+#   single-connection writer engine that takes the write lock up front.
+# - "legacy": one default engine for everything, no pragmas.
+DB_PROFILE = os.environ.get("CT_DB_PROFILE", "production").lower()
+# NORMAL is durable across app crashes in WAL mode; FULL also survives power loss
+# at the cost of an fsync per commit (which group commit amortizes, see writer.py)
+SYNCHRONOUS = os.environ.get("CT_DB_SYNCHRONOUS", "NORMAL").upper()
+if SYNCHRONOUS not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+    raise ValueError(f"CT_DB_SYNCHRONOUS must be OFF, NORMAL, FULL or EXTRA, not {SYNCHRONOUS!r}")
+BUSY_TIMEOUT_MS = int(os.environ.get("CT_DB_BUSY_TIMEOUT_MS", "5000"))
+CACHE_SIZE_KB = int(os.environ.get("CT_DB_CACHE_KB", "65536"))
+MMAP_SIZE = int(os.environ.get("CT_DB_MMAP_BYTES", str(256 * 1024 * 1024)))
+READ_POOL_SIZE = int(os.environ.get("CT_DB_READ_POOL", "8"))
+# CT_DB_ASYNC=1 serves the API from the async routers (aiosqlite) instead of
+# the sync ones running in Starlette's threadpool.
+ASYNC_DB = os.environ.get("CT_DB_ASYNC", "0").lower() in ("1", "true", "yes", "on")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def _apply_pragmas(dbapi_conn, *, writer: bool) -> None:
+    cur = dbapi_conn.cursor()
+    try:
+        if writer:
+            cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+        cur.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        cur.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+        cur.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        if not writer:
+            cur.execute("PRAGMA query_only=ON")
+    finally:
+        cur.close()
+
+
+def _configure_writer(sync_engine) -> None:
+    @event.listens_for(sync_engine, "connect")
+    def _on_write_connect(dbapi_conn, _record):
+        # Let SQLAlchemy own transaction boundaries so BEGIN IMMEDIATE can be issued
+        dbapi_conn.isolation_level = None
+        _apply_pragmas(dbapi_conn, writer=True)
+
+    @event.listens_for(sync_engine, "begin")
+    def _on_write_begin(conn):
+        # Take the write lock at BEGIN: waits honour busy_timeout instead of
+        # failing on a read-to-write lock upgrade.
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _configure_reader(sync_engine) -> None:
+    @event.listens_for(sync_engine, "connect")
+    def _on_read_connect(dbapi_conn, _record):
+        _apply_pragmas(dbapi_conn, writer=False)
+
+
+def build_engines(url: str = SQLALCHEMY_DATABASE_URL, profile: str = DB_PROFILE):
+    """Return ``(write_engine, read_engine)`` for a storage profile.
+
+    With the legacy profile both names refer to the same engine.
+    """
+    if profile == "legacy":
+        eng = create_engine(url, connect_args={"check_same_thread": False})
+        return eng, eng
+
+    write_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": BUSY_TIMEOUT_MS / 1000},
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=30,
+    )
+    _configure_writer(write_engine)
+    read_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": BUSY_TIMEOUT_MS / 1000},
+        pool_size=READ_POOL_SIZE,
+        max_overflow=READ_POOL_SIZE,
+    )
+    _configure_reader(read_engine)
+    return write_engine, read_engine
+
+
+def build_async_engines(url: str = ASYNC_DATABASE_URL, profile: str = DB_PROFILE):
+    """Async (aiosqlite) counterpart of ``build_engines``."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    if profile == "legacy":
+        eng = create_async_engine(url)
+        return eng, eng
+
+    write_engine = create_async_engine(
+        url,
+        poolclass=AsyncAdaptedQueuePool,
+        connect_args={"timeout": BUSY_TIMEOUT_MS / 1000},
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=30,
+    )
+    _configure_writer(write_engine.sync_engine)
+    read_engine = create_async_engine(
+        url,
+        poolclass=AsyncAdaptedQueuePool,
+        connect_args={"timeout": BUSY_TIMEOUT_MS / 1000},
+        pool_size=READ_POOL_SIZE,
+        max_overflow=READ_POOL_SIZE,
+    )
+    _configure_reader(read_engine.sync_engine)
+    return write_engine, read_engine
+
+
+engine, read_engine = build_engines()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+
+async_engine = async_read_engine = None
+AsyncSessionLocal = AsyncReadSessionLocal = None
+if ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine, async_read_engine = build_async_engines()
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+
+async def dispose_async_engines() -> None:
+    """Close pooled aiosqlite connections; their worker threads keep the process alive otherwise."""
+    for eng in {id(e): e for e in (async_engine, async_read_engine) if e is not None}.values():
+        await eng.dispose()
+
+
+def engines() -> list[tuple[str, Engine]]:
+    """``(role, engine)`` for every distinct engine; async engines as their ``sync_engine``.
+
+    Event listeners and pool statistics work on these for both flavours.
+    """
+    found = [("write", engine), ("read", read_engine)]
+    if async_engine is not None:
+        found += [("async_write", async_engine.sync_engine), ("async_read", async_read_engine.sync_engine)]
+    out, seen = [], set()
+    for role, eng in found:
+        # The legacy profile uses one engine for both roles
+        if id(eng) not in seen:
+            seen.add(id(eng))
+            out.append((role, eng))
+    return out
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
-    db = SessionLocal()
+def get_db(request: Request):
+    """Read-only session for safe methods, the single writer session otherwise."""
+    factory = ReadSessionLocal if request.method in READ_METHODS else SessionLocal
+    db = factory()
     try:
         yield db
     finally:
         db.close()
 
+
+async def get_async_db(request: Request):
+    """Async counterpart of ``get_db`` (requires CT_DB_ASYNC=1)."""
+    factory = AsyncReadSessionLocal if request.method in READ_METHODS else AsyncSessionLocal
+    async with factory() as db:
+        yield db
+
+
+def get_read_db():
+    """Read-only session whatever the method, for lookups that must not take the write lock."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,64 @@
+"""Serialize list endpoints straight from row tuples, byte for byte like the response schemas."""
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Iterable, Mapping, Optional
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def enabled() -> bool:
+    return os.environ.get("CT_FAST_JSON", "on").lower() not in ("off", "none", "0", "false")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        text = value.isoformat()
+        if isinstance(value, datetime) and value.utcoffset() == timedelta(0):
+            text = text[:-6] + "Z"
+        return text
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_UTC_Z)
+else:
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` encoded with ``dumps``: compact and non-ASCII as UTF-8."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def schema_columns(schema, model) -> list:
+    """``model`` columns for ``schema``'s fields, in field order (which is the JSON key order)."""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def encode_rows(
+    columns: Iterable,
+    rows: Iterable[tuple],
+    transforms: Optional[Mapping[str, Callable[[Any], Any]]] = None,
+) -> bytes:
+    """JSON array of objects, one per row, keyed by the ``columns``' names."""
+    keys = [getattr(c, "key", c) for c in columns]
+    if not transforms:
+        return dumps([dict(zip(keys, row)) for row in rows])
+    steps = [(i, transforms[k]) for i, k in enumerate(keys) if k in transforms]
+    out = []
+    for row in rows:
+        values = list(row)
+        for i, fn in steps:
+            values[i] = fn(values[i])
+        out.append(dict(zip(keys, values)))
+    return dumps(out)
@@ -0,0 +1,122 @@
+"""Spatial lookups for places backed by an SQLite R*Tree index."""
+import math
+
+from fastapi import HTTPException
+from sqlalchemy import Column, Float, Integer, MetaData, Table, and_, or_
+
+from . import models
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Not part of Base.metadata: virtual tables are created by setup_statements()
+places_rtree = Table(
+    "places_rtree",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("min_lon", Float),
+    Column("max_lon", Float),
+    Column("min_lat", Float),
+    Column("max_lat", Float),
+)
+
+
+def setup_statements() -> list[str]:
+    """DDL creating the R*Tree, its sync triggers, and backfilling missing rows."""
+    return [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS places_rtree USING rtree(id, min_lon, max_lon, min_lat, max_lat)",
+        """CREATE TRIGGER IF NOT EXISTS places_rtree_ai AFTER INSERT ON places BEGIN
+            INSERT OR REPLACE INTO places_rtree (id, min_lon, max_lon, min_lat, max_lat)
+            VALUES (new.id, new.longitude, new.longitude, new.latitude, new.latitude);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS places_rtree_au AFTER UPDATE OF latitude, longitude ON places BEGIN
+            INSERT OR REPLACE INTO places_rtree (id, min_lon, max_lon, min_lat, max_lat)
+            VALUES (new.id, new.longitude, new.longitude, new.latitude, new.latitude);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS places_rtree_ad AFTER DELETE ON places BEGIN
+            DELETE FROM places_rtree WHERE id = old.id;
+        END""",
+        """INSERT INTO places_rtree (id, min_lon, max_lon, min_lat, max_lat)
+            SELECT id, longitude, longitude, latitude, latitude FROM places
+            WHERE id NOT IN (SELECT id FROM places_rtree)""",
+    ]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_bbox(raw: str) -> tuple[float, float, float, float]:
+    """Parse ``minLon,minLat,maxLon,maxLat``. ``minLon > maxLon`` crosses the antimeridian."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in raw.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be minLon,minLat,maxLon,maxLat")
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise HTTPException(status_code=400, detail="bbox is out of range")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def bbox_around(lat: float, lon: float, radius_km: float) -> tuple[float, float, float, float]:
+    """Smallest lon/lat box containing the circle of ``radius_km`` around a point."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        # Circle reaches a pole: every longitude qualifies
+        return -180.0, max(min_lat, -90.0), 180.0, min(max_lat, 90.0)
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(lat))))
+    if dlon >= 180:
+        return -180.0, min_lat, 180.0, max_lat
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180:
+        min_lon += 360
+    if max_lon > 180:
+        max_lon -= 360
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def filter_bbox(query, bbox: tuple[float, float, float, float]):
+    """Restrict a ``Place`` query to a bounding box via the R*Tree."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    r = places_rtree.c
+    lat_cond = and_(r.max_lat >= min_lat, r.min_lat <= max_lat)
+    exact_lat = models.Place.latitude.between(min_lat, max_lat)
+    if min_lon <= max_lon:
+        lon_cond = and_(r.max_lon >= min_lon, r.min_lon <= max_lon)
+        exact_lon = models.Place.longitude.between(min_lon, max_lon)
+    else:
+        lon_cond = or_(r.max_lon >= min_lon, r.min_lon <= max_lon)
+        exact_lon = or_(models.Place.longitude >= min_lon, models.Place.longitude <= max_lon)
+    # R*Tree coordinates are 32-bit floats rounded outwards, so re-check exactly
+    return (
+        query.join(places_rtree, r.id == models.Place.id)
+        .filter(lat_cond, lon_cond)
+        .filter(exact_lat, exact_lon)
+    )
+
+
+def nearby_places(db, lat: float, lon: float, radius_km: float, limit: int):
+    """Places within ``radius_km`` of a point, nearest first, as ``(place, distance_km)``.
+
+    Candidates come from the R*Tree as bare coordinates; only the final
+    ``limit`` rows are loaded as ORM objects.
+    """
+    candidates = filter_bbox(
+        db.query(models.Place.id, models.Place.latitude, models.Place.longitude),
+        bbox_around(lat, lon, radius_km),
+    ).all()
+    ranked = []
+    for pid, plat, plon in candidates:
+        dist = haversine_km(lat, lon, plat, plon)
+        if dist <= radius_km:
+            ranked.append((dist, pid))
+    ranked.sort()
+    ranked = ranked[:limit]
+    if not ranked:
+        return []
+    by_id = {p.id: p for p in db.query(models.Place).filter(models.Place.id.in_([pid for _, pid in ranked]))}
+    return [(by_id[pid], dist) for dist, pid in ranked if pid in by_id]
@@ -0,0 +1,103 @@
+"""Argon2 password hashing in a bounded process pool, off the request path."""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+
+ARGON2_TIME_COST = int(os.environ.get("CT_ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_KIB = int(os.environ.get("CT_ARGON2_MEMORY_KIB", "65536"))
+ARGON2_PARALLELISM = int(os.environ.get("CT_ARGON2_PARALLELISM", "4"))
+
+WORKERS = int(os.environ.get("CT_HASH_WORKERS", str(min(2, os.cpu_count() or 1))))
+QUEUE_LIMIT = int(os.environ.get("CT_HASH_QUEUE", str(max(1, WORKERS) * 4)))
+RETRY_AFTER_SECONDS = 1
+
+# deprecated="auto" makes needs_update() flag hashes whose parameters differ from these
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_KIB,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, QUEUE_LIMIT))
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool(wait: bool = True) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=True)
+            _pool = None
+
+
+def _submit(fn, *args) -> Future:
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password operations in progress, retry shortly",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    try:
+        try:
+            future = _get_pool().submit(fn, *args)
+        except BrokenProcessPool:
+            shutdown_pool(wait=False)
+            future = _get_pool().submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _f: _slots.release())
+    return future
+
+
+def hash_password(password: str) -> str:
+    if WORKERS <= 0:
+        return _hash(password)
+    return _submit(_hash, password).result()
+
+
+def verify_and_update(password: str, hashed: str) -> tuple[bool, Optional[str]]:
+    """``(valid, new_hash)``; ``new_hash`` is set when ``hashed`` uses outdated parameters."""
+    if WORKERS <= 0:
+        return _verify_and_update(password, hashed)
+    return _submit(_verify_and_update, password, hashed).result()
+
+
+async def hash_password_async(password: str) -> str:
+    if WORKERS <= 0:
+        return _hash(password)
+    return await asyncio.wrap_future(_submit(_hash, password))
+
+
+async def verify_and_update_async(password: str, hashed: str) -> tuple[bool, Optional[str]]:
+    if WORKERS <= 0:
+        return _verify_and_update(password, hashed)
+    return await asyncio.wrap_future(_submit(_verify_and_update, password, hashed))
@@ -0,0 +1,159 @@
+"""Responsive WebP variants and placeholders for uploaded gallery images."""
+import base64
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from .storage import CHUNK_SIZE, PUBLIC_PREFIX, UPLOAD_DIR, delete_blob, local_path
+
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (320, 640, 1280)
+WEBP_QUALITY = 80
+PLACEHOLDER_WIDTH = 16
+
+ENABLED = os.environ.get("CT_IMAGE_VARIANTS", "on").lower() not in ("off", "none", "0", "false")
+WORKERS = int(os.environ.get("CT_IMAGE_WORKERS", str(min(2, os.cpu_count() or 1))))
+
+
+def variant_relpath(sha256: str, width: int) -> str:
+    return os.path.join(sha256[:2], sha256[2:4], f"{sha256}_w{width}.webp")
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _save_webp(img, path: str) -> None:
+    if os.path.exists(path):
+        # Content-addressed: an existing file already holds this exact rendition
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        img.save(tmp, "WEBP", quality=WEBP_QUALITY, method=4)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def render_variants(src_path: str, sha256: Optional[str] = None) -> dict:
+    """Write WebP variants of ``src_path`` and build its placeholder. Runs in a worker process.
+
+    Returns ``{"sha256", "variants": [{"width", "height", "url"}], "placeholder"}``
+    with variants ordered by width.
+    """
+    from PIL import Image, ImageFilter, ImageOps
+
+    if sha256 is None:
+        sha256 = _file_sha256(src_path)
+    with Image.open(src_path) as src:
+        # Let the JPEG decoder downscale by a power of two before the full decode
+        largest = min(VARIANT_WIDTHS[-1], src.width)
+        src.draft("RGB", (largest, max(1, src.height * largest // src.width)))
+        img = ImageOps.exif_transpose(src)
+        has_alpha = "A" in img.getbands() or "transparency" in img.info
+        img = img.convert("RGBA" if has_alpha else "RGB")
+
+    widths = sorted({min(w, img.width) for w in VARIANT_WIDTHS}, reverse=True)
+    variants = []
+    current = img
+    for width in widths:
+        if width != current.width:
+            height = max(1, round(current.height * width / current.width))
+            # Each step resizes the previous (larger) rendition rather than the original
+            current = current.resize((width, height), Image.LANCZOS, reducing_gap=2.0)
+        rel = variant_relpath(sha256, width)
+        _save_webp(current, os.path.join(UPLOAD_DIR, rel))
+        variants.append({"width": width, "height": current.height, "url": PUBLIC_PREFIX + rel.replace(os.sep, "/")})
+    variants.reverse()
+
+    tiny = current.copy()
+    tiny.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH))
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    buf = io.BytesIO()
+    tiny.save(buf, "WEBP", quality=30)
+    placeholder = "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+    return {"sha256": sha256, "variants": variants, "placeholder": placeholder}
+
+
+def delete_variants(variants: Optional[list]) -> None:
+    for variant in variants or ():
+        delete_blob(variant.get("url"))
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: workers must not inherit the server's threads, sockets or DB connections
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, workers or WORKERS), mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown_pool(wait: bool = True) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=True)
+            _pool = None
+
+
+def save_variants(image_id: int, result: dict) -> None:
+    """Record a finished render on its gallery row. Commits."""
+    from . import models
+    from .cache import response_cache
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.query(models.GalleryImage).filter(models.GalleryImage.id == image_id).update(
+            {"variants": result["variants"], "placeholder": result["placeholder"]},
+            synchronize_session=False,
+        )
+        db.commit()
+    finally:
+        db.close()
+    response_cache.invalidate("gallery")
+
+
+def _on_rendered(image_id: int, future: Future) -> None:
+    if future.cancelled():
+        return
+    try:
+        save_variants(image_id, future.result())
+    except Exception:
+        logger.exception("Building variants for gallery image %s failed", image_id)
+
+
+def schedule_variants(image_id: int, image_url: str, sha256: Optional[str] = None) -> Optional[Future]:
+    """Queue variant rendering for a stored upload; no-op for external URLs or when disabled."""
+    path = local_path(image_url)
+    if not ENABLED or not path:
+        return None
+    try:
+        future = get_pool().submit(render_variants, path, sha256)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM on a huge image); start a fresh pool
+        shutdown_pool(wait=False)
+        future = get_pool().submit(render_variants, path, sha256)
+    future.add_done_callback(lambda f: _on_rendered(image_id, f))
+    return future
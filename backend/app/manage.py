@@ -0,0 +1,173 @@
+"""Maintenance commands: ``python -m app.manage <command>``."""
+import argparse
+import os
+
+from .database import SessionLocal
+
+
+def cmd_migrate(args) -> None:
+    from .migrations import LATEST, MIGRATIONS, applied, migrate
+
+    if args.status:
+        done = {row[0]: row for row in applied()}
+        for version, description, _ in MIGRATIONS:
+            row = done.get(version)
+            state = f"applied {row[2]} ({row[3]:.0f} ms)" if row else "pending"
+            print(f"{version:3d}  {description:<45} {state}")
+        return
+    report = migrate(target=args.target)
+    for version, description, ms in report["applied"]:
+        print(f"applied {version}: {description} ({ms:.0f} ms)")
+    print(f"Schema at version {report['version']} of {LATEST}")
+
+
+def cmd_recount_reactions(args) -> None:
+    from .reactions import recount_reactions
+
+    db = SessionLocal()
+    try:
+        recount_reactions(db)
+    finally:
+        db.close()
+    print("Reaction counters recomputed")
+
+
+def cmd_rebuild_search(args) -> None:
+    from .search import rebuild_index
+
+    db = SessionLocal()
+    try:
+        rebuild_index(db)
+    finally:
+        db.close()
+    print("Search index rebuilt")
+
+
+def cmd_rebuild_clusters(args) -> None:
+    from .clusters import rebuild_index
+
+    db = SessionLocal()
+    try:
+        rebuild_index(db)
+    finally:
+        db.close()
+    print("Map cluster grid rebuilt")
+
+
+def cmd_build_variants(args) -> None:
+    from . import models
+    from .images import get_pool, render_variants, shutdown_pool
+    from .cache import response_cache
+    from .storage import local_path
+
+    db = SessionLocal()
+    try:
+        query = db.query(models.GalleryImage).filter(models.GalleryImage.image_url.like("/uploads/%"))
+        if not args.force:
+            query = query.filter(models.GalleryImage.variants.is_(None))
+        jobs = {}
+        for img in query.all():
+            path = local_path(img.image_url)
+            if path and os.path.exists(path):
+                jobs[img.id] = get_pool(args.workers).submit(render_variants, path, img.content_hash)
+            else:
+                print(f"skip #{img.id}: {img.image_url} is missing")
+        done = failed = 0
+        for image_id, future in jobs.items():
+            try:
+                result = future.result()
+            except Exception as exc:
+                failed += 1
+                print(f"fail #{image_id}: {exc}")
+                continue
+            img = db.get(models.GalleryImage, image_id)
+            img.variants, img.placeholder = result["variants"], result["placeholder"]
+            # Files uploaded before content addressing get their hash recorded too
+            img.content_hash = img.content_hash or result["sha256"]
+            db.commit()
+            done += 1
+        response_cache.invalidate("gallery")
+    finally:
+        db.close()
+        shutdown_pool()
+    print(f"Variants built for {done} image(s), {failed} failed")
+
+
+def cmd_import_places(args) -> None:
+    import json
+
+    from .bulk import import_places, iter_records, resolve_format
+    from .cache import response_cache
+
+    db = SessionLocal()
+    try:
+        with open(args.file, "rb") as fh:
+            report = import_places(
+                db, iter_records(fh, resolve_format(args.format, args.file)), upsert=args.upsert, dry_run=args.dry_run
+            )
+    finally:
+        db.close()
+    response_cache.invalidate("places")
+    for err in report.pop("errors"):
+        print(f"line {err['line']}: {err['error']}")
+    print(json.dumps(report))
+
+
+def cmd_export_places(args) -> None:
+    import sys
+
+    from . import models
+    from .bulk import PLACE_EXPORT_COLUMNS, export_statement, resolve_format, stream_rows
+    from .database import ReadSessionLocal
+
+    fmt = resolve_format(args.format, args.output)
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in stream_rows(ReadSessionLocal, export_statement(models.Place, PLACE_EXPORT_COLUMNS), PLACE_EXPORT_COLUMNS, fmt):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.manage")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("migrate", help="Apply pending schema migrations")
+    p.add_argument("--status", action="store_true", help="list migrations and whether they are applied")
+    p.add_argument("--target", type=int, help="stop at this version (default: latest)")
+    p.set_defaults(func=cmd_migrate)
+
+    p = sub.add_parser("recount-reactions", help="Recompute like/dislike counters from the reactions tables")
+    p.set_defaults(func=cmd_recount_reactions)
+
+    p = sub.add_parser("rebuild-search", help="Rebuild the full-text search index from places and comments")
+    p.set_defaults(func=cmd_rebuild_search)
+
+    p = sub.add_parser("rebuild-clusters", help="Recompute the map cluster grid from places")
+    p.set_defaults(func=cmd_rebuild_clusters)
+
+    p = sub.add_parser("build-variants", help="Render WebP variants for uploaded gallery images that lack them")
+    p.add_argument("--force", action="store_true", help="re-render images that already have variants")
+    p.add_argument("--workers", type=int, default=None, help="worker processes (default: CT_IMAGE_WORKERS)")
+    p.set_defaults(func=cmd_build_variants)
+
+    p = sub.add_parser("import-places", help="Import places from an NDJSON or CSV file")
+    p.add_argument("file")
+    p.add_argument("--format", choices=("ndjson", "csv"), help="default: from the file extension")
+    p.add_argument("--upsert", choices=("name", "external_id"), help="update places that already exist")
+    p.add_argument("--dry-run", action="store_true", help="validate and report without saving")
+    p.set_defaults(func=cmd_import_places)
+
+    p = sub.add_parser("export-places", help="Export all places as NDJSON or CSV")
+    p.add_argument("-o", "--output", help="file to write (default: stdout)")
+    p.add_argument("--format", choices=("ndjson", "csv"), help="default: from the output extension, else ndjson")
+    p.set_defaults(func=cmd_export_places)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
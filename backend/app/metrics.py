@@ -0,0 +1,246 @@
+"""Process metrics in the Prometheus text format, served at ``/metrics``."""
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+from sqlalchemy import event
+
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def enabled() -> bool:
+    return os.environ.get("CT_METRICS", "on").lower() not in ("off", "none", "0", "false")
+
+
+class Histogram:
+    """Label tuple -> bucket counts, sum and count. Not thread-safe on its own."""
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # [per-bucket counts (+Inf last), sum, count]
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self, name: str, label_names: tuple[str, ...]) -> list[str]:
+        lines = []
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            base = _labels(label_names, labels)
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts):
+                cumulative += n
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{{{base + ',' if base else ''}{le}}} {cumulative}")
+            lines.append(f"{name}_sum{_braces(base)} {total:.6f}")
+            lines.append(f"{name}_count{_braces(base)} {count}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    return ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+
+
+def _braces(labels: str) -> str:
+    return f"{{{labels}}}" if labels else ""
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: dict[tuple, int] = {}
+        self.request_latency = Histogram(HTTP_BUCKETS)
+        self.in_flight = 0
+        self.queries: dict[str, int] = {}
+        self.query_errors: dict[str, int] = {}
+        self.query_latency = Histogram(DB_BUCKETS)
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route, status)
+        with self._lock:
+            self.in_flight -= 1
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.request_latency.observe((method, route), seconds)
+
+    def query_finished(self, engine: str, seconds: float) -> None:
+        with self._lock:
+            self.queries[engine] = self.queries.get(engine, 0) + 1
+            self.query_latency.observe((engine,), seconds)
+
+    def query_failed(self, engine: str) -> None:
+        with self._lock:
+            self.query_errors[engine] = self.query_errors.get(engine, 0) + 1
+
+    def render(self, gauges: Iterable[tuple[str, str, str, dict, float]] = ()) -> str:
+        out: list[str] = []
+        with self._lock:
+            out += _header("ct_http_requests_total", "counter", "HTTP requests by route and status")
+            out += [
+                f"ct_http_requests_total{{{_labels(('method', 'route', 'status'), key)}}} {n}"
+                for key, n in sorted(self.requests.items())
+            ]
+            out += _header("ct_http_request_duration_seconds", "histogram", "HTTP request latency by route")
+            out += self.request_latency.render("ct_http_request_duration_seconds", ("method", "route"))
+            out += _header("ct_http_requests_in_flight", "gauge", "HTTP requests being served")
+            out.append(f"ct_http_requests_in_flight {self.in_flight}")
+            out += _header("ct_db_queries_total", "counter", "SQL statements executed")
+            out += [f'ct_db_queries_total{{engine="{e}"}} {n}' for e, n in sorted(self.queries.items())]
+            out += _header("ct_db_query_errors_total", "counter", "SQL statements that raised")
+            out += [f'ct_db_query_errors_total{{engine="{e}"}} {n}' for e, n in sorted(self.query_errors.items())]
+            out += _header("ct_db_query_duration_seconds", "histogram", "SQL statement latency")
+            out += self.query_latency.render("ct_db_query_duration_seconds", ("engine",))
+        declared: set[str] = set()
+        for name, kind, help_text, labels, value in gauges:
+            if name not in declared:
+                declared.add(name)
+                out += _header(name, kind, help_text)
+            out.append(f"{name}{_braces(_labels(tuple(labels), tuple(labels.values())))} {value}")
+        return "\n".join(out) + "\n"
+
+
+def _header(name: str, kind: str, help_text: str) -> list[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+registry = Registry()
+
+
+class MetricsMiddleware:
+    """Pure ASGI: times the whole request, including other middleware."""
+
+    def __init__(self, app, metrics: Optional[Registry] = None):
+        self.app = app
+        self.metrics = metrics or registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.metrics.request_started()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.request_finished(scope["method"], _route_label(scope), status, time.perf_counter() - start)
+
+
+def _route_label(scope) -> str:
+    # The router stores the matched route in the (shared) scope
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path:
+        return path
+    # Mounted apps (uploads, frontend build) set an endpoint but no route
+    return "static" if "endpoint" in scope else "unmatched"
+
+
+def instrument_engine(engine, label: str, metrics: Optional[Registry] = None) -> None:
+    """Count and time every statement run on ``engine`` (sync, or an AsyncEngine's ``sync_engine``)."""
+    metrics = metrics or registry
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        metrics.query_finished(label, time.perf_counter() - conn.info["query_start"].pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+        metrics.query_failed(label)
+
+
+_instrumented: set[int] = set()
+
+
+def instrument_engines() -> None:
+    """Instrument the application's engines, once each."""
+    from .database import engines
+
+    for label, eng in engines():
+        if id(eng) not in _instrumented:
+            _instrumented.add(id(eng))
+            instrument_engine(eng, label)
+
+
+def collect_gauges(startup: Optional[dict] = None) -> list[tuple[str, str, str, dict, float]]:
+    """Point-in-time saturation gauges; call from the event loop (threadpool stats are per loop).
+
+    ``startup`` is ``app.state.startup``, set by ``create_app``.
+    """
+    import anyio.to_thread
+
+    from . import database
+    from .auth import user_cache
+    from .cache import response_cache
+    from .compression import compressed_cache
+    from .writer import group_writer
+
+    gauges = []
+    for cache_name, cache in (("responses", response_cache), ("compressed", compressed_cache), ("users", user_cache)):
+        stats = cache.stats()
+        labels = {"cache": cache_name}
+        gauges += [
+            ("ct_cache_entries", "gauge", "Entries held", labels, stats["entries"]),
+            ("ct_cache_bytes", "gauge", "Approximate bytes held", labels, stats["bytes"]),
+            ("ct_cache_hits_total", "counter", "Lookups served from the cache", labels, stats["hits"]),
+            ("ct_cache_misses_total", "counter", "Lookups that missed", labels, stats["misses"]),
+            ("ct_cache_evictions_total", "counter", "Entries evicted for space", labels, stats["evictions"]),
+        ]
+
+    for label, eng in database.engines():
+        pool = eng.pool
+        if not hasattr(pool, "checkedout"):
+            continue
+        labels = {"engine": label}
+        gauges.append(("ct_db_pool_checked_out", "gauge", "Connections in use", labels, pool.checkedout()))
+        gauges.append(("ct_db_pool_size", "gauge", "Configured pool size (excluding overflow)", labels, pool.size()))
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    stats = limiter.statistics()
+    gauges += [
+        ("ct_threadpool_busy", "gauge", "Worker threads running sync endpoints and dependencies", {}, stats.borrowed_tokens),
+        ("ct_threadpool_size", "gauge", "Worker thread limit", {}, stats.total_tokens),
+        ("ct_threadpool_waiting", "gauge", "Tasks waiting for a worker thread", {}, stats.tasks_waiting),
+    ]
+    if group_writer is not None:
+        gauges.append(("ct_group_commit_queue", "gauge", "Writes queued for the group-commit writer", {}, group_writer.pending))
+    if startup:
+        migrations = startup["migrations"]
+        gauges += [
+            ("ct_schema_version", "gauge", "Schema migration version", {}, migrations["version"]),
+            ("ct_startup_seconds", "gauge", "Time spent building the app at startup", {"phase": "migrations"},
+             round(migrations["seconds"], 6)),
+            ("ct_startup_seconds", "gauge", "Time spent building the app at startup", {"phase": "total"},
+             round(startup["seconds"], 6)),
+        ]
+    return gauges
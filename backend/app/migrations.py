@@ -0,0 +1,296 @@
+"""Versioned schema migrations, run once per database rather than once per worker."""
+import logging
+import os
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.pool import NullPool
+
+from . import models
+from .database import DB_PROFILE, SQLALCHEMY_DATABASE_URL, Base, _apply_pragmas
+from .clusters import setup_index as setup_cluster_index
+from .geo import setup_statements as geo_setup_statements
+from .reactions import recount_statements
+from .search import setup_index as setup_search_index
+from .versions import setup_statements as versions_setup_statements
+
+
+logger = logging.getLogger(__name__)
+
+LOCK_TIMEOUT_MS = int(os.environ.get("CT_MIGRATION_LOCK_TIMEOUT_MS", "600000"))
+
+_VERSION_TABLE = """CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    duration_ms REAL NOT NULL
+)"""
+
+
+def _columns(conn: Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})").fetchall()}
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> bool:
+    """``ALTER TABLE table ADD COLUMN column ddl`` unless it exists; True if added."""
+    if column in _columns(conn, table):
+        return False
+    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+    return True
+
+
+def _create_tables(conn: Connection) -> None:
+    Base.metadata.create_all(bind=conn)
+
+
+def _places_created_by(conn: Connection) -> None:
+    _add_column(conn, "places", "created_by", "INTEGER")
+
+
+def _users_role(conn: Connection) -> None:
+    if _add_column(conn, "users", "role", "VARCHAR(20) NOT NULL DEFAULT 'user'"):
+        conn.exec_driver_sql("UPDATE users SET role='user' WHERE role IS NULL")
+
+
+def _reaction_client_ids(conn: Connection) -> None:
+    # Anonymous likes, one per browser
+    for table, fk, index in (
+        ("place_reactions", "place_id", "uq_place_reaction_client"),
+        ("gallery_reactions", "image_id", "uq_gallery_reaction_client"),
+    ):
+        _add_column(conn, table, "client_id", "VARCHAR(120)")
+        conn.exec_driver_sql(f"CREATE UNIQUE INDEX IF NOT EXISTS {index} ON {table} ({fk}, client_id)")
+
+
+def _comments_keyset_index(conn: Connection) -> None:
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_comments_place_id_id ON comments (place_id, id)")
+
+
+def _spatial_index(conn: Connection) -> None:
+    for stmt in geo_setup_statements():
+        conn.exec_driver_sql(stmt)
+
+
+def _search_index(conn: Connection) -> None:
+    setup_search_index(conn)
+
+
+def _gallery_content_hash(conn: Connection) -> None:
+    _add_column(conn, "gallery_images", "content_hash", "VARCHAR(64)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_gallery_images_content_hash ON gallery_images (content_hash)")
+
+
+def _places_external_id(conn: Connection) -> None:
+    _add_column(conn, "places", "external_id", "VARCHAR(100)")
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS ix_places_external_id ON places (external_id)")
+
+
+def _gallery_variants(conn: Connection) -> None:
+    _add_column(conn, "gallery_images", "variants", "JSON")
+    _add_column(conn, "gallery_images", "placeholder", "TEXT")
+
+
+def _collection_versions(conn: Connection) -> None:
+    for stmt in versions_setup_statements():
+        conn.exec_driver_sql(stmt)
+
+
+def _reaction_counters(conn: Connection) -> None:
+    added = False
+    for table in ("places", "gallery_images"):
+        for col in ("likes", "dislikes"):
+            added |= _add_column(conn, table, col, "INTEGER NOT NULL DEFAULT 0")
+    if added:
+        # Backfill from the reactions that already exist
+        for stmt in recount_statements():
+            conn.exec_driver_sql(stmt)
+
+
+SAMPLE_PLACES = [
+    dict(
+        name="Table Mountain",
+        description="Iconic flat-topped mountain with sweeping views of Cape Town.",
+        latitude=-33.9628,
+        longitude=18.4098,
+        image_url="https://images.unsplash.com/photo-1583266094121-6c6f8f5779c4?q=80&w=1200&auto=format&fit=crop",
+    ),
+    dict(
+        name="V&A Waterfront",
+        description="Vibrant harbor with shops, restaurants, and beautiful waterfront views.",
+        latitude=-33.9036,
+        longitude=18.4204,
+        image_url="https://images.unsplash.com/photo-1606581538094-6ab696648efa?q=80&w=1200&auto=format&fit=crop",
+    ),
+    dict(
+        name="Cape Point",
+        description="Dramatic cliffs and lighthouse at the tip of the Cape Peninsula.",
+        latitude=-34.3573,
+        longitude=18.4977,
+        image_url="https://images.unsplash.com/photo-1599743818179-1fb26a40cc1b?q=80&w=1200&auto=format&fit=crop",
+    ),
+    dict(
+        name="Camps Bay Beach",
+        description="White sand beach backed by the Twelve Apostles mountain range.",
+        latitude=-33.9510,
+        longitude=18.3772,
+        image_url="https://images.unsplash.com/photo-1601650080075-ecff6a221073?q=80&w=1200&auto=format&fit=crop",
+    ),
+    dict(
+        name="Bo-Kaap",
+        description="Historic neighborhood known for its colorful houses and Cape Malay culture.",
+        latitude=-33.9201,
+        longitude=18.4141,
+        image_url="https://images.unsplash.com/photo-1602467181047-3b60ae3c1055?q=80&w=1200&auto=format&fit=crop",
+    ),
+]
+
+
+def _seed_initial_data(conn: Connection) -> None:
+    # Default admin user; the only Argon2 hash computed at startup, and only once per database
+    users = models.User.__table__
+    if conn.execute(select(users.c.id).where(users.c.username == "admin")).first() is None:
+        from .auth import get_password_hash
+
+        conn.execute(insert(users).values(
+            username="admin", email="admin@example.com", hashed_password=get_password_hash("pioner18"), role="admin",
+        ))
+    # Sample places for an empty database
+    places = models.Place.__table__
+    if conn.execute(select(places.c.id).limit(1)).first() is None:
+        conn.execute(insert(places), SAMPLE_PLACES)
+
+
+def _place_clusters(conn: Connection) -> None:
+    setup_cluster_index(conn)
+
+
+# (version, description, fn): append only. Older databases start at version 0, so
+# every fn must be a no-op where its change already exists
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "create tables", _create_tables),
+    (2, "places.created_by", _places_created_by),
+    (3, "users.role", _users_role),
+    (4, "reactions.client_id for anonymous likes", _reaction_client_ids),
+    (5, "comments (place_id, id) index", _comments_keyset_index),
+    (6, "R*Tree spatial index over places", _spatial_index),
+    (7, "FTS5 search index over places and comments", _search_index),
+    (8, "gallery_images.content_hash", _gallery_content_hash),
+    (9, "places.external_id", _places_external_id),
+    (10, "gallery_images.variants and placeholder", _gallery_variants),
+    (11, "collection version triggers", _collection_versions),
+    (12, "like/dislike counters", _reaction_counters),
+    (13, "admin user and sample places", _seed_initial_data),
+    (14, "per-zoom map cluster grid over places", _place_clusters),
+]
+LATEST = MIGRATIONS[-1][0]
+assert [v for v, _, _ in MIGRATIONS] == list(range(1, LATEST + 1)), "migration versions must be 1..N in order"
+
+
+def _migration_engine(url: str) -> Engine:
+    eng = create_engine(url, poolclass=NullPool)
+
+    @event.listens_for(eng, "connect")
+    def _on_connect(dbapi_conn, _record):
+        # SQLAlchemy issues BEGIN itself, so DDL is transactional too
+        dbapi_conn.isolation_level = None
+        if DB_PROFILE != "legacy":
+            _apply_pragmas(dbapi_conn, writer=True)
+        dbapi_conn.execute(f"PRAGMA busy_timeout={LOCK_TIMEOUT_MS}")
+
+    @event.listens_for(eng, "begin")
+    def _on_begin(conn):
+        # One migrator at a time; the others wait here (up to busy_timeout)
+        conn.exec_driver_sql("BEGIN EXCLUSIVE")
+
+    return eng
+
+
+def _current_version(dbapi_conn) -> int:
+    cur = dbapi_conn.cursor()
+    try:
+        if cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'").fetchone() is None:
+            return 0
+        return cur.execute("SELECT coalesce(max(version), 0) FROM schema_version").fetchone()[0]
+    finally:
+        cur.close()
+
+
+def current_version(url: str = SQLALCHEMY_DATABASE_URL) -> int:
+    eng = _migration_engine(url)
+    try:
+        conn = eng.raw_connection()
+        try:
+            return _current_version(conn)
+        finally:
+            conn.close()
+    finally:
+        eng.dispose()
+
+
+def applied(url: str = SQLALCHEMY_DATABASE_URL) -> list[tuple]:
+    """``(version, description, applied_at, duration_ms)`` for every recorded migration."""
+    eng = _migration_engine(url)
+    try:
+        conn = eng.raw_connection()
+        try:
+            if _current_version(conn) == 0:
+                return []
+            return conn.execute(
+                "SELECT version, description, applied_at, duration_ms FROM schema_version ORDER BY version"
+            ).fetchall()
+        finally:
+            conn.close()
+    finally:
+        eng.dispose()
+
+
+def migrate(url: str = SQLALCHEMY_DATABASE_URL, target: Optional[int] = None) -> dict:
+    """Bring the database to ``target`` (default: latest) and report what was done.
+
+    Returns ``{"version", "applied": [(version, description, ms)], "waited_ms", "seconds"}``.
+    """
+    target = LATEST if target is None else target
+    start = time.perf_counter()
+    report = {"version": 0, "applied": [], "waited_ms": 0.0, "seconds": 0.0}
+    eng = _migration_engine(url)
+    try:
+        raw = eng.raw_connection()
+        try:
+            version = _current_version(raw)
+        finally:
+            raw.close()
+        if version < target:
+            version = _apply(eng, target, report)
+        report["version"] = version
+    finally:
+        eng.dispose()
+    report["seconds"] = time.perf_counter() - start
+    if report["applied"]:
+        logger.info(
+            "Applied migrations %s in %.0f ms; schema at version %d",
+            ", ".join(str(v) for v, _, _ in report["applied"]), report["seconds"] * 1000, version,
+        )
+    return report
+
+
+def _apply(eng: Engine, target: int, report: dict) -> int:
+    t0 = time.perf_counter()
+    with eng.begin() as conn:
+        report["waited_ms"] = (time.perf_counter() - t0) * 1000
+        conn.exec_driver_sql(_VERSION_TABLE)
+        version = conn.exec_driver_sql("SELECT coalesce(max(version), 0) FROM schema_version").scalar()
+        for number, description, fn in MIGRATIONS:
+            if not version < number <= target:
+                continue
+            step = time.perf_counter()
+            fn(conn)
+            ms = (time.perf_counter() - step) * 1000
+            conn.exec_driver_sql(
+                "INSERT INTO schema_version (version, description, duration_ms) VALUES (?, ?, ?)",
+                (number, description, round(ms, 3)),
+            )
+            report["applied"].append((number, description, round(ms, 3)))
+            version = number
+    return version
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DateTime, func, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DateTime, func, UniqueConstraint, Index, JSON
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from .database import Base
 
@@ -26,6 +26,11 @@ class Place(Base):
     longitude: Mapped[float] = mapped_column(Float, nullable=False)
     image_url: Mapped[str | None] = mapped_column(String(500), nullable=True)
     created_by: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
+    # Identifier from an imported dataset, used to upsert on re-import
+    external_id: Mapped[str | None] = mapped_column(String(100), unique=True, index=True, nullable=True)
+    # Denormalized reaction counters, maintained alongside place_reactions
+    likes: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    dislikes: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     comments: Mapped[list["Comment"]] = relationship(
         "Comment", back_populates="place", cascade="all, delete-orphan"
@@ -35,6 +40,10 @@ class Place(Base):
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        # Keyset pagination of a place's comments: WHERE place_id = ? AND id < ? ORDER BY id DESC
+        Index("ix_comments_place_id_id", "place_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     place_id: Mapped[int] = mapped_column(ForeignKey("places.id"), index=True)
@@ -61,8 +70,17 @@ class GalleryImage(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     title: Mapped[str | None] = mapped_column(String(200), nullable=True)
     image_url: Mapped[str] = mapped_column(String(600), nullable=False)
+    # SHA-256 of uploaded content (None for images added by URL)
+    content_hash: Mapped[str | None] = mapped_column(String(64), index=True, nullable=True)
+    # Resized WebP renditions [{"width", "height", "url"}] and a blurred data-URI preview,
+    # filled in by the background variant pipeline (see images.py)
+    variants: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    placeholder: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_by: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
     created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Denormalized reaction counters, maintained alongside gallery_reactions
+    likes: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    dislikes: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
 
 class PlaceReaction(Base):
@@ -93,3 +111,13 @@ class GalleryReaction(Base):
     client_id: Mapped[str | None] = mapped_column(String(120), index=True, nullable=True)
     value: Mapped[int] = mapped_column(Integer)
     created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class CollectionVersion(Base):
+    """Change marker per cacheable collection, bumped by triggers on every write."""
+
+    __tablename__ = "collection_versions"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[str] = mapped_column(String(40), nullable=False)
@@ -0,0 +1,51 @@
+import base64
+import json
+from typing import Optional
+
+from fastapi import HTTPException, Response
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(query, id_column, cursor: Optional[str], limit: Optional[int], descending: bool = False):
+    """Apply ``id``-keyset pagination to ``query``.
+
+    Returns ``(rows, next_cursor)``. Without ``cursor`` and ``limit`` the full
+    result is returned so existing clients keep working.
+    """
+    order = id_column.desc() if descending else id_column.asc()
+    query = query.order_by(order)
+    if cursor is None and limit is None:
+        return query.all(), None
+
+    if cursor is not None:
+        after = decode_cursor(cursor)
+        query = query.filter(id_column < after if descending else id_column > after)
+    size = limit or DEFAULT_PAGE_SIZE
+    rows = query.limit(size + 1).all()
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    last = rows[-1]
+    return rows, encode_cursor(last.id)
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,157 @@
+"""Per-request SQL profiling for development."""
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+
+
+logger = logging.getLogger(__name__)
+
+NPLUSONE_THRESHOLD = int(os.environ.get("CT_NPLUSONE_THRESHOLD", "5"))
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACES = re.compile(r"\s+")
+# Transaction control is not a query for budgeting purposes
+_CONTROL = re.compile(r"\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b", re.IGNORECASE)
+
+
+def enabled() -> bool:
+    return os.environ.get("CT_QUERY_PROFILER", "off").lower() in ("1", "true", "yes", "on")
+
+
+def statement_shape(statement: str) -> str:
+    """SQL with whitespace normalised and ``IN`` lists of any length made equal."""
+    return _IN_LIST.sub("(?...)", _SPACES.sub(" ", statement).strip())
+
+
+class QueryLog:
+    def __init__(self):
+        self.statements: list[tuple[str, float]] = []  # (statement, seconds)
+        self._lock = threading.Lock()
+
+    def add(self, statement: str, seconds: float) -> None:
+        with self._lock:
+            self.statements.append((statement, seconds))
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def seconds(self) -> float:
+        return sum(d for _, d in self.statements)
+
+    def repeated(self, threshold: int = NPLUSONE_THRESHOLD) -> list[tuple[str, int]]:
+        """Statement shapes run at least ``threshold`` times, most frequent first."""
+        counts = Counter(statement_shape(s) for s, _ in self.statements)
+        return [(shape, n) for shape, n in counts.most_common() if n >= threshold]
+
+
+_current: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+_global_logs: list[QueryLog] = []
+_global_lock = threading.Lock()
+_instrumented: set[int] = set()
+
+
+def _instrument(engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profiler_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["profiler_start"].pop()
+        if _CONTROL.match(statement):
+            return
+        log = _current.get()
+        if log is not None:
+            log.add(statement, elapsed)
+        if _global_logs:
+            with _global_lock:
+                for log in _global_logs:
+                    log.add(statement, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get("profiler_start"):
+            conn.info["profiler_start"].pop()
+
+
+def install() -> None:
+    """Hook the application's engines, once each."""
+    from .database import engines
+
+    for _, eng in engines():
+        if id(eng) not in _instrumented:
+            _instrumented.add(id(eng))
+            _instrument(eng)
+
+
+class QueryProfilerMiddleware:
+    def __init__(self, app, threshold: int = NPLUSONE_THRESHOLD):
+        self.app = app
+        self.threshold = threshold
+        install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        log = QueryLog()
+        token = _current.set(log)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - start) * 1000
+                db_ms = log.seconds * 1000
+                headers = list(message.get("headers") or [])
+                headers += [
+                    (b"x-query-count", str(log.count).encode()),
+                    (b"server-timing", f'db;dur={db_ms:.1f};desc="{log.count} queries", app;dur={total_ms:.1f}'.encode()),
+                    (b"timing-allow-origin", b"*"),
+                ]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            for shape, n in log.repeated(self.threshold):
+                logger.warning("Possible N+1 in %s %s: %d x %s", scope["method"], scope["path"], n, shape[:300])
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryLog]:
+    """Collect every statement run on any engine, from any thread, while the block runs."""
+    install()
+    log = QueryLog()
+    with _global_lock:
+        _global_logs.append(log)
+    try:
+        yield log
+    finally:
+        with _global_lock:
+            _global_logs.remove(log)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryLog]:
+    """Fail with the offending statements when the block runs more than ``limit`` queries.
+
+        with assert_max_queries(3):
+            client.get("/api/places/1/page")
+    """
+    with count_queries() as log:
+        yield log
+    if log.count > limit:
+        listing = "\n".join(f"  {statement_shape(s)[:200]}" for s, _ in log.statements)
+        raise AssertionError(f"{log.count} queries, expected at most {limit}:\n{listing}")
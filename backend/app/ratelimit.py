@@ -0,0 +1,233 @@
+"""Token-bucket rate limiting for anonymous-friendly write endpoints."""
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+
+MAX_BODY_PEEK = 16 * 1024
+_PERIODS = {"s": 1.0, "sec": 1.0, "m": 60.0, "min": 60.0, "h": 3600.0, "hour": 3600.0}
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    method: str
+    pattern: "re.Pattern[str]"
+    rate: float  # tokens per second
+    burst: float
+
+
+# name -> (method, path regex, default limit)
+DEFAULT_RULES = {
+    "react": [("PUT", r"^/api/places/\d+/react$"), ("PUT", r"^/api/gallery/\d+/react$")],
+    "comment": [("POST", r"^/api/comments/place/\d+$")],
+    "contact": [("POST", r"^/api/contacts/?$")],
+}
+DEFAULT_LIMITS = {"react": "60/min:20", "comment": "10/min:5", "contact": "5/min:3"}
+
+
+def parse_limit(spec: str) -> tuple[float, float]:
+    """``"60/min:20"`` -> ``(1.0, 20.0)`` (tokens per second, burst). Burst defaults to the count."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*/\s*([a-z]+)\s*(?::\s*(\d+(?:\.\d+)?))?\s*", spec)
+    if not match or match.group(2) not in _PERIODS:
+        raise ValueError(f"invalid rate limit {spec!r}")
+    count = float(match.group(1))
+    burst = float(match.group(3) or count)
+    return count / _PERIODS[match.group(2)], max(1.0, burst)
+
+
+def build_rules(overrides: Optional[str] = None) -> list[Rule]:
+    limits = dict(DEFAULT_LIMITS)
+    for item in (overrides or "").split(","):
+        if "=" in item:
+            name, spec = item.split("=", 1)
+            limits[name.strip()] = spec
+    rules = []
+    for name, routes in DEFAULT_RULES.items():
+        rate, burst = parse_limit(limits[name])
+        rules.extend(Rule(name, method, re.compile(path), rate, burst) for method, path in routes)
+    return rules
+
+
+class TokenBuckets:
+    """Thread-safe token buckets keyed by arbitrary hashables, bounded by count."""
+
+    def __init__(self, max_buckets: int = 100_000):
+        self.max_buckets = max_buckets
+        # key -> [tokens, last_refill, full_at]
+        self._buckets: "OrderedDict[tuple, list[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def take(self, keys: list[tuple], rate: float, burst: float) -> float:
+        """Take one token from every bucket in ``keys``; return 0, or seconds to wait if any is empty."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            states = []
+            created = []
+            wait = 0.0
+            for key in keys:
+                state = self._buckets.get(key)
+                if state is None:
+                    state = [burst, now, now]
+                    self._buckets[key] = state
+                    created.append(key)
+                else:
+                    state[0] = min(burst, state[0] + (now - state[1]) * rate)
+                    state[1] = now
+                    self._buckets.move_to_end(key)
+                if state[0] < 1.0:
+                    wait = max(wait, (1.0 - state[0]) / rate)
+                states.append(state)
+            if wait:
+                # Nothing was taken, so buckets created here are still full:
+                # keeping them would only let rejected requests grow the map
+                for key in created:
+                    del self._buckets[key]
+                self.rejected += 1
+            else:
+                for state in states:
+                    state[0] -= 1.0
+                    state[2] = now + (burst - state[0]) / rate
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def _expire(self, now: float) -> None:
+        # LRU order approximates refill order: drop full (idle) buckets from the cold end
+        buckets = self._buckets
+        for _ in range(8):
+            if not buckets:
+                return
+            key = next(iter(buckets))
+            if buckets[key][2] > now:
+                return
+            del buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers") or ():
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def client_ip(scope, trust_proxy: bool = False) -> str:
+    if trust_proxy:
+        forwarded = _header(scope, b"x-forwarded-for")
+        if forwarded:
+            # nginx appends the peer address; earlier entries are client-controlled
+            return forwarded.rsplit(",", 1)[-1].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _user_key(scope) -> Optional[str]:
+    auth = _header(scope, b"authorization")
+    if not auth or not auth.lower().startswith("bearer "):
+        return None
+    from .auth import _decode_token
+
+    payload = _decode_token(auth.split(" ", 1)[1].strip())
+    if not payload:
+        return None
+    return str(payload.get("user_id") or payload["sub"])
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, rules: Optional[list[Rule]] = None, buckets: Optional[TokenBuckets] = None,
+                 trust_proxy: Optional[bool] = None):
+        self.app = app
+        self.rules = rules if rules is not None else build_rules(os.environ.get("CT_RATE_LIMITS"))
+        self.methods = frozenset(rule.method for rule in self.rules)
+        self.buckets = buckets or limiter_buckets
+        if trust_proxy is None:
+            trust_proxy = os.environ.get("CT_TRUST_PROXY", "0").lower() in ("1", "true", "yes", "on")
+        self.trust_proxy = trust_proxy
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.methods:
+            return await self.app(scope, receive, send)
+        rule = self._match(scope["method"], scope["path"])
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        keys = [(rule.name, "ip", client_ip(scope, self.trust_proxy))]
+        user = _user_key(scope)
+        if user:
+            keys.append((rule.name, "user", user))
+        receive, client_id = await self._peek_client_id(scope, receive)
+        if client_id:
+            keys.append((rule.name, "client", client_id))
+
+        wait = self.buckets.take(keys, rule.rate, rule.burst)
+        if wait:
+            body = b'{"detail":"Too many requests, retry later"}'
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        await self.app(scope, receive, send)
+
+    def _match(self, method: str, path: str) -> Optional[Rule]:
+        for rule in self.rules:
+            if rule.method == method and rule.pattern.match(path):
+                return rule
+        return None
+
+    async def _peek_client_id(self, scope, receive):
+        """Read a small JSON body to find ``client_id``; return a receive that replays it."""
+        length = _header(scope, b"content-length")
+        if not length or not length.isdigit() or int(length) > MAX_BODY_PEEK:
+            return receive, None
+        chunks, more = [], True
+        messages = []
+        while more:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            more = message.get("more_body", False)
+        client_id = None
+        try:
+            data = json.loads(b"".join(chunks))
+            if isinstance(data, dict) and isinstance(data.get("client_id"), str):
+                client_id = data["client_id"][:120]
+        except ValueError:
+            pass
+
+        async def replay():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        return replay, client_id
+
+
+limiter_buckets = TokenBuckets(int(os.environ.get("CT_RATE_LIMIT_BUCKETS", "100000")))
+
+
+def enabled() -> bool:
+    return os.environ.get("CT_RATE_LIMIT", "on").lower() not in ("off", "none", "0", "false")
@@ -0,0 +1,171 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import text, update
+from sqlalchemy.orm import Session
+
+from . import models
+
+
+MAX_BATCH_IDS = 500
+
+
+def parse_ids(raw: str) -> list[int]:
+    """Parse a comma-separated ``ids`` query value into unique ints, preserving order."""
+    out: list[int] = []
+    seen: set[int] = set()
+    for part in (raw or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        value = int(part)
+        if value not in seen:
+            seen.add(value)
+            out.append(value)
+    return out
+
+
+def _owner_filter(reaction_model, user_id: Optional[int], client_id: Optional[str]):
+    if user_id is not None:
+        return reaction_model.user_id == user_id
+    if client_id:
+        return reaction_model.client_id == client_id
+    return None
+
+
+def my_reaction(
+    db: Session,
+    reaction_model,
+    target_column,
+    target_id: int,
+    user_id: Optional[int] = None,
+    client_id: Optional[str] = None,
+) -> Optional[int]:
+    """The caller's own reaction to one target, when the counts are already at hand."""
+    owner_filter = _owner_filter(reaction_model, user_id, client_id)
+    if owner_filter is None:
+        return None
+    return db.query(reaction_model.value).filter(target_column == target_id, owner_filter).scalar()
+
+
+def summarize_reactions(
+    db: Session,
+    target_model,
+    reaction_model,
+    target_column,
+    target_ids: Iterable[int],
+    user_id: Optional[int] = None,
+    client_id: Optional[str] = None,
+) -> dict[int, dict]:
+    """Return ``{target_id: {"likes", "dislikes", "my"}}`` for every requested id.
+
+    Counts come from the denormalized ``likes``/``dislikes`` columns on the
+    target rows; the caller's own reactions are fetched in one extra lookup.
+    """
+    ids = list(target_ids)
+    result = {tid: {"likes": 0, "dislikes": 0, "my": None} for tid in ids}
+    if not ids:
+        return result
+
+    rows = (
+        db.query(target_model.id, target_model.likes, target_model.dislikes)
+        .filter(target_model.id.in_(ids))
+        .all()
+    )
+    for tid, likes, dislikes in rows:
+        result[tid]["likes"] = likes or 0
+        result[tid]["dislikes"] = dislikes or 0
+
+    owner_filter = _owner_filter(reaction_model, user_id, client_id)
+    if owner_filter is None:
+        return result
+    mine = db.query(target_column, reaction_model.value).filter(target_column.in_(ids), owner_filter).all()
+    for tid, value in mine:
+        result[tid]["my"] = value
+    return result
+
+
+def toggle_reaction(
+    db: Session,
+    target_model,
+    reaction_model,
+    target_column,
+    target_id: int,
+    value: int,
+    user_id: Optional[int] = None,
+    client_id: Optional[str] = None,
+) -> None:
+    """Insert, flip or remove the caller's reaction and adjust the counters.
+
+    Repeating the same value removes the reaction. Counter updates are issued
+    as SQL increments in the caller's transaction; nothing is committed here.
+    """
+    if user_id is not None:
+        owner_filter = reaction_model.user_id == user_id
+    else:
+        owner_filter = reaction_model.client_id == client_id
+    rec = db.query(reaction_model).filter(target_column == target_id, owner_filter).first()
+
+    old = rec.value if rec else None
+    if rec and rec.value == value:
+        db.delete(rec)
+        new = None
+    elif rec:
+        rec.value = value
+        new = value
+    else:
+        db.add(
+            reaction_model(
+                **{target_column.key: target_id},
+                user_id=user_id,
+                client_id=None if user_id is not None else client_id,
+                value=value,
+            )
+        )
+        new = value
+
+    d_likes = int(new == 1) - int(old == 1)
+    d_dislikes = int(new == -1) - int(old == -1)
+    if d_likes or d_dislikes:
+        db.flush()
+        db.execute(
+            update(target_model)
+            .where(target_model.id == target_id)
+            .values(likes=target_model.likes + d_likes, dislikes=target_model.dislikes + d_dislikes)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def recount_statements() -> list[str]:
+    """SQL that recomputes every denormalized counter from the reactions tables."""
+    return [
+        f"UPDATE {table} SET "
+        f"likes = (SELECT COUNT(*) FROM {reactions} r WHERE r.{fk} = {table}.id AND r.value = 1), "
+        f"dislikes = (SELECT COUNT(*) FROM {reactions} r WHERE r.{fk} = {table}.id AND r.value = -1)"
+        for table, reactions, fk in (
+            ("places", "place_reactions", "place_id"),
+            ("gallery_images", "gallery_reactions", "image_id"),
+        )
+    ]
+
+
+def recount_reactions(db: Session) -> None:
+    """Repair counters that drifted from the reactions tables. Commits."""
+    for stmt in recount_statements():
+        db.execute(text(stmt))
+    db.commit()
+
+
+def place_reactions(db: Session, place_ids: Iterable[int], user_id: Optional[int] = None, client_id: Optional[str] = None) -> dict[int, dict]:
+    return summarize_reactions(db, models.Place, models.PlaceReaction, models.PlaceReaction.place_id, place_ids, user_id, client_id)
+
+
+def image_reactions(db: Session, image_ids: Iterable[int], user_id: Optional[int] = None, client_id: Optional[str] = None) -> dict[int, dict]:
+    return summarize_reactions(db, models.GalleryImage, models.GalleryReaction, models.GalleryReaction.image_id, image_ids, user_id, client_id)
+
+
+def apply_place_reaction(db: Session, place_id: int, value: int, user_id: Optional[int] = None, client_id: Optional[str] = None) -> None:
+    toggle_reaction(db, models.Place, models.PlaceReaction, models.PlaceReaction.place_id, place_id, value, user_id, client_id)
+
+
+def apply_image_reaction(db: Session, image_id: int, value: int, user_id: Optional[int] = None, client_id: Optional[str] = None) -> None:
+    toggle_reaction(db, models.GalleryImage, models.GalleryReaction, models.GalleryReaction.image_id, image_id, value, user_id, client_id)
@@ -0,0 +1,80 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from .. import bulk, models, schemas
+from ..auth import require_admin
+from ..cache import response_cache
+from ..database import ReadSessionLocal, get_db
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/cache")
+def cache_stats(admin: models.User = Depends(require_admin)):
+    return {"responses": response_cache.stats()}
+
+
+@router.delete("/cache", status_code=204)
+def clear_cache(admin: models.User = Depends(require_admin)):
+    response_cache.clear()
+    return None
+
+
+@router.post("/places/import", response_model=schemas.ImportResult)
+def import_places(
+    file: UploadFile = File(...),
+    fmt: Optional[str] = Query(None, alias="format", description="ndjson or csv (default: from the file name)"),
+    upsert: Optional[str] = Query(None, description="update existing places matched by name or external_id"),
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    admin: models.User = Depends(require_admin),
+):
+    records = bulk.iter_records(file.file, bulk.resolve_format(fmt, file.filename))
+    report = bulk.import_places(db, records, upsert=upsert, created_by=admin.id, dry_run=dry_run)
+    if not dry_run and (report["inserted"] or report["updated"]):
+        response_cache.invalidate("places")
+    return report
+
+
+@router.get("/places/export")
+def export_places(
+    fmt: str = Query("ndjson", alias="format", description="ndjson or csv"),
+    admin: models.User = Depends(require_admin),
+):
+    return _export("places", models.Place, bulk.PLACE_EXPORT_COLUMNS, fmt)
+
+
+@router.get("/contacts/export")
+def export_contacts(
+    fmt: str = Query("ndjson", alias="format", description="ndjson or csv"),
+    since: Optional[datetime] = Query(None, description="created at or after (UTC unless an offset is given)"),
+    until: Optional[datetime] = Query(None, description="created before"),
+    admin: models.User = Depends(require_admin),
+):
+    return _export("contacts", models.ContactMessage, bulk.CONTACT_EXPORT_COLUMNS, fmt, since, until)
+
+
+@router.get("/comments/export")
+def export_comments(
+    fmt: str = Query("ndjson", alias="format", description="ndjson or csv"),
+    since: Optional[datetime] = Query(None, description="created at or after (UTC unless an offset is given)"),
+    until: Optional[datetime] = Query(None, description="created before"),
+    place_id: Optional[int] = None,
+    admin: models.User = Depends(require_admin),
+):
+    return _export("comments", models.Comment, bulk.COMMENT_EXPORT_COLUMNS, fmt, since, until, place_id=place_id)
+
+
+def _export(name: str, model, columns, fmt: str, since=None, until=None, **equals) -> StreamingResponse:
+    fmt = bulk.resolve_format(fmt)
+    stmt = bulk.export_statement(model, columns, since, until, **equals)
+    return StreamingResponse(
+        bulk.stream_rows(ReadSessionLocal, stmt, columns, fmt),
+        media_type=bulk.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
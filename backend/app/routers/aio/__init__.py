@@ -0,0 +1,49 @@
+"""Async routers, served instead of the sync ones when CT_DB_ASYNC=1."""
+import asyncio
+from functools import lru_cache
+from typing import Any, Callable, Iterable
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...writer import WAIT_TIMEOUT, group_writer, run_write, write_timeout
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+async def call_sync(db: AsyncSession, endpoint: Callable, response_model: Any = None, /, **kwargs) -> Any:
+    """Run a sync endpoint on ``db``'s connection and return its result.
+
+    ORM results are validated into ``response_model`` while still inside the
+    greenlet, so lazy loads during serialization don't leave the session.
+    """
+
+    def _run(session):
+        result = endpoint(db=session, **kwargs)
+        if response_model is None or result is None or isinstance(result, Response):
+            return result
+        return _adapter(response_model).validate_python(result, from_attributes=True)
+
+    return await db.run_sync(_run)
+
+
+async def call_write(db: AsyncSession, fn: Callable, tags: Iterable[str] = (), /, **kwargs) -> Any:
+    """Async counterpart of ``writer.run_write``.
+
+    With group commit on, the request awaits its batch instead of blocking the
+    loop; otherwise ``fn`` runs and commits on ``db`` like a sync endpoint.
+    """
+    if group_writer is not None:
+        await db.commit()
+        future = group_writer.submit(fn, tags, **kwargs)
+        result = asyncio.wrap_future(future)
+        done, _ = await asyncio.wait({result}, timeout=WAIT_TIMEOUT)
+        if not done and future.cancel():
+            raise write_timeout()
+        # Otherwise its batch already started: the write may commit, so report the real outcome
+        return await result
+    return await db.run_sync(lambda session: run_write(session, fn, tags, **kwargs))
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...database import get_async_db
+from ... import models, schemas
+from ...auth import create_access_token, get_current_user_async
+from ...hashing import hash_password_async, verify_and_update_async
+
+
+router = APIRouter(prefix="/api/auth", tags=["auth"])
+
+
+@router.post("/register", response_model=schemas.UserOut, status_code=201)
+async def register_user(payload: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    # Hash first so the writer connection is not held during Argon2
+    hashed = await hash_password_async(payload.password)
+    exists = (
+        await db.execute(
+            select(models.User.id).where((models.User.username == payload.username) | (models.User.email == str(payload.email)))
+        )
+    ).first()
+    if exists:
+        raise HTTPException(status_code=400, detail="Username or email already registered")
+    user = models.User(username=payload.username, email=str(payload.email), hashed_password=hashed, role="user")
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+
+@router.post("/login", response_model=schemas.TokenOut)
+async def login(payload: schemas.LoginInput, db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(select(models.User).where(models.User.username == payload.username))).scalars().first()
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password")
+    out, hashed = schemas.UserOut.model_validate(user), user.hashed_password
+    # Release the writer connection while Argon2 runs
+    await db.commit()
+    valid, new_hash = await verify_and_update_async(payload.password, hashed)
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password")
+    if new_hash:
+        # Stored hash predates the current Argon2 cost settings
+        await db.execute(update(models.User).where(models.User.id == out.id).values(hashed_password=new_hash))
+        await db.commit()
+    token = create_access_token({}, user=out)
+    return schemas.TokenOut(access_token=token, user=out)
+
+
+@router.get("/me", response_model=schemas.UserOut)
+async def me(current_user: models.User = Depends(get_current_user_async)):
+    return current_user
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from ...database import get_async_db
+from ... import schemas
+from ...pagination import MAX_PAGE_SIZE
+from .. import comments as sync
+from . import call_sync, call_write
+
+
+router = APIRouter(prefix="/api/comments", tags=["comments"])
+
+
+@router.get("/place/{place_id}", response_model=List[schemas.CommentOut])
+async def list_comments_for_place(
+    place_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await call_sync(
+        db, sync.list_comments_for_place, List[schemas.CommentOut],
+        place_id=place_id, request=request, response=response, cursor=cursor, limit=limit,
+    )
+
+
+@router.post("/place/{place_id}", response_model=schemas.CommentOut, status_code=201)
+async def create_comment(place_id: int, payload: schemas.CommentCreate, db: AsyncSession = Depends(get_async_db)):
+    return await call_write(db, sync.write_comment, ("comments",), place_id=place_id, payload=payload)
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from ...database import get_async_db
+from ... import schemas
+from ...pagination import MAX_PAGE_SIZE
+from .. import contacts as sync
+from . import call_sync, call_write
+
+
+router = APIRouter(prefix="/api/contacts", tags=["contacts"])
+
+
+@router.post("/", response_model=schemas.ContactOut, status_code=201)
+async def create_contact(payload: schemas.ContactCreate, db: AsyncSession = Depends(get_async_db)):
+    return await call_write(db, sync.write_contact, payload=payload)
+
+
+@router.get("/", response_model=List[schemas.ContactOut])
+async def list_contacts(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await call_sync(db, sync.list_contacts, List[schemas.ContactOut], response=response, cursor=cursor, limit=limit)
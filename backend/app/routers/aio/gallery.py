@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, List, Optional
+
+from ...database import get_async_db
+from ... import models, schemas
+from ...auth import get_optional_user_async, require_admin_async
+from ...pagination import MAX_PAGE_SIZE
+from ...storage import stage_upload
+from .. import gallery as sync
+from . import call_sync, call_write
+
+
+router = APIRouter(prefix="/api/gallery", tags=["gallery"])
+
+
+@router.get("/", response_model=List[schemas.GalleryOut])
+async def list_gallery(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await call_sync(db, sync.list_gallery, List[schemas.GalleryOut], request=request, cursor=cursor, limit=limit)
+
+
+@router.get("/reactions", response_model=Dict[int, schemas.ReactionOut])
+async def get_images_reactions_batch(
+    ids: str,
+    client_id: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User | None = Depends(get_optional_user_async),
+):
+    return await call_sync(db, sync.get_images_reactions_batch, None, ids=ids, client_id=client_id, current_user=current_user)
+
+
+@router.post("/url", response_model=schemas.GalleryOut, status_code=201)
+async def add_gallery_by_url(
+    payload: schemas.GalleryCreateUrl,
+    db: AsyncSession = Depends(get_async_db),
+    admin: models.User = Depends(require_admin_async),
+):
+    return await call_sync(db, sync.add_gallery_by_url, schemas.GalleryOut, payload=payload, admin=admin)
+
+
+@router.post("/upload", response_model=schemas.GalleryOut, status_code=201)
+async def upload_gallery_image(
+    file: UploadFile = File(...),
+    title: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_async_db),
+    admin: models.User = Depends(require_admin_async),
+):
+    # Blocking file I/O and hashing run in the threadpool, off the event loop
+    staged = await run_in_threadpool(stage_upload, file.file, file.filename)
+    return await call_sync(db, sync.record_upload, schemas.GalleryOut, title=title, staged=staged, admin=admin)
+
+
+@router.delete("/{image_id}", status_code=204)
+async def delete_image(
+    image_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    admin: models.User = Depends(require_admin_async),
+):
+    return await call_sync(db, sync.delete_image, None, image_id=image_id, admin=admin)
+
+
+@router.get("/{image_id}/reactions", response_model=schemas.ReactionOut)
+async def get_image_reactions(
+    image_id: int,
+    client_id: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User | None = Depends(get_optional_user_async),
+):
+    return await call_sync(db, sync.get_image_reactions, None, image_id=image_id, client_id=client_id, current_user=current_user)
+
+
+@router.put("/{image_id}/react", response_model=schemas.ReactionOut)
+async def react_image(
+    image_id: int,
+    payload: schemas.ReactionIn,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User | None = Depends(get_optional_user_async),
+):
+    return await call_write(db, sync.write_image_reaction, ("gallery",), image_id=image_id, payload=payload, current_user=current_user)
@@ -0,0 +1,127 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+
+from ...database import get_async_db
+from ... import models, schemas
+from ...auth import get_current_user_async, get_optional_user_async, require_admin_async
+from ...pagination import MAX_PAGE_SIZE
+from .. import places as sync
+from . import call_sync, call_write
+
+
+router = APIRouter(prefix="/api/places", tags=["places"])
+
+
+@router.get("/", response_model=List[schemas.PlaceOut])
+async def list_places(
+    request: Request,
+    bbox: Optional[str] = Query(None, description="minLon,minLat,maxLon,maxLat"),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await call_sync(db, sync.list_places, List[schemas.PlaceOut], request=request, bbox=bbox, cursor=cursor, limit=limit)
+
+
+@router.get("/nearby", response_model=List[schemas.PlaceNearbyOut])
+async def list_nearby_places(
+    request: Request,
+    response: Response,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5.0, gt=0, le=1000),
+    limit: int = Query(20, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await call_sync(
+        db, sync.list_nearby_places, None,
+        request=request, response=response, lat=lat, lon=lon, radius_km=radius_km, limit=limit,
+    )
+
+
+@router.get("/clusters", response_model=schemas.PlaceClusters)
+async def list_place_clusters(
+    request: Request,
+    bbox: str = Query(..., description="minLon,minLat,maxLon,maxLat"),
+    zoom: int = Query(..., ge=0, le=22),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await call_sync(db, sync.list_place_clusters, schemas.PlaceClusters, request=request, bbox=bbox, zoom=zoom)
+
+
+@router.get("/reactions", response_model=Dict[int, schemas.ReactionOut])
+async def get_places_reactions_batch(
+    ids: str,
+    client_id: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User | None = Depends(get_optional_user_async),
+):
+    return await call_sync(db, sync.get_places_reactions_batch, None, ids=ids, client_id=client_id, current_user=current_user)
+
+
+@router.get("/{place_id}", response_model=schemas.PlaceDetail)
+async def get_place(place_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await call_sync(db, sync.get_place, schemas.PlaceDetail, place_id=place_id, request=request)
+
+
+@router.get("/{place_id}/page", response_model=schemas.PlacePage)
+async def get_place_page(
+    place_id: int,
+    client_id: str | None = None,
+    comments_limit: int = Query(sync.PLACE_COMMENTS_PAGE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User | None = Depends(get_optional_user_async),
+):
+    return await call_sync(
+        db, sync.get_place_page, schemas.PlacePage,
+        place_id=place_id, client_id=client_id, comments_limit=comments_limit, current_user=current_user,
+    )
+
+
+@router.post("/", response_model=schemas.PlaceOut, status_code=201)
+async def create_place(
+    place: schemas.PlaceCreate,
+    db: AsyncSession = Depends(get_async_db),
+    admin: models.User = Depends(require_admin_async),
+):
+    return await call_sync(db, sync.create_place, schemas.PlaceOut, place=place, admin=admin)
+
+
+@router.put("/{place_id}", response_model=schemas.PlaceOut)
+async def update_place(
+    place_id: int,
+    payload: schemas.PlaceUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
+):
+    return await call_sync(db, sync.update_place, schemas.PlaceOut, place_id=place_id, payload=payload, current_user=current_user)
+
+
+@router.get("/{place_id}/reactions", response_model=schemas.ReactionOut)
+async def get_place_reactions(
+    place_id: int,
+    client_id: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User | None = Depends(get_optional_user_async),
+):
+    return await call_sync(db, sync.get_place_reactions, None, place_id=place_id, client_id=client_id, current_user=current_user)
+
+
+@router.put("/{place_id}/react", response_model=schemas.ReactionOut)
+async def react_place(
+    place_id: int,
+    payload: schemas.ReactionIn,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User | None = Depends(get_optional_user_async),
+):
+    return await call_write(db, sync.write_place_reaction, ("places",), place_id=place_id, payload=payload, current_user=current_user)
+
+
+@router.delete("/{place_id}", status_code=204)
+async def delete_place(
+    place_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
+):
+    return await call_sync(db, sync.delete_place, None, place_id=place_id, current_user=current_user)
@@ -3,7 +3,8 @@ from sqlalchemy.orm import Session
 
 from ..database import get_db
 from .. import models, schemas
-from ..auth import get_password_hash, verify_password, create_access_token, get_current_user
+from ..auth import create_access_token, get_current_user
+from ..hashing import hash_password, verify_and_update
 
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
@@ -11,13 +12,16 @@ router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 @router.post("/register", response_model=schemas.UserOut, status_code=201)
 def register_user(payload: schemas.UserCreate, db: Session = Depends(get_db)):
+    # Hash before touching the database: the check and insert below then run in one
+    # short write transaction instead of holding the writer connection during Argon2
+    hashed = hash_password(payload.password)
     exists = db.query(models.User).filter((models.User.username == payload.username) | (models.User.email == str(payload.email))).first()
     if exists:
         raise HTTPException(status_code=400, detail="Username or email already registered")
     user = models.User(
         username=payload.username,
         email=str(payload.email),
-        hashed_password=get_password_hash(payload.password),
+        hashed_password=hashed,
         role="user",
     )
     db.add(user)
@@ -29,10 +33,20 @@ def register_user(payload: schemas.UserCreate, db: Session = Depends(get_db)):
 @router.post("/login", response_model=schemas.TokenOut)
 def login(payload: schemas.LoginInput, db: Session = Depends(get_db)):
     user = db.query(models.User).filter(models.User.username == payload.username).first()
-    if not user or not verify_password(payload.password, user.hashed_password):
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password")
-    token = create_access_token({"sub": user.username})
-    return schemas.TokenOut(access_token=token, user=user)
+    out, hashed = schemas.UserOut.model_validate(user), user.hashed_password
+    # Release the writer connection while Argon2 runs
+    db.commit()
+    valid, new_hash = verify_and_update(payload.password, hashed)
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password")
+    if new_hash:
+        # Stored hash predates the current Argon2 cost settings
+        db.query(models.User).filter(models.User.id == out.id).update({"hashed_password": new_hash})
+        db.commit()
+    token = create_access_token({}, user=out)
+    return schemas.TokenOut(access_token=token, user=out)
 
 
 @router.get("/me", response_model=schemas.UserOut)
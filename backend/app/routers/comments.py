@@ -1,35 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from ..database import get_db
 from .. import models, schemas
+from ..pagination import MAX_PAGE_SIZE, keyset_page, set_next_cursor
+from ..versions import conditional
+from ..writer import run_write
 
 
 router = APIRouter(prefix="/api/comments", tags=["comments"])
 
 
 @router.get("/place/{place_id}", response_model=List[schemas.CommentOut])
-def list_comments_for_place(place_id: int, db: Session = Depends(get_db)):
+def list_comments_for_place(
+    place_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    cond = conditional(request, db, "places", "comments")
+    if cond.not_modified:
+        return cond.response_304()
     place_exists = db.query(models.Place.id).filter(models.Place.id == place_id).first()
     if not place_exists:
         raise HTTPException(status_code=404, detail="Place not found")
-    return (
-        db.query(models.Comment)
-        .filter(models.Comment.place_id == place_id)
-        .order_by(models.Comment.id.desc())
-        .all()
+    cond.apply(response)
+    # Served by the (place_id, id) index on comments
+    rows, next_cursor = keyset_page(
+        db.query(models.Comment).filter(models.Comment.place_id == place_id),
+        models.Comment.id,
+        cursor,
+        limit,
+        descending=True,
     )
+    set_next_cursor(response, next_cursor)
+    return rows
 
 
 @router.post("/place/{place_id}", response_model=schemas.CommentOut, status_code=201)
 def create_comment(place_id: int, payload: schemas.CommentCreate, db: Session = Depends(get_db)):
+    return run_write(db, write_comment, ("comments",), place_id=place_id, payload=payload)
+
+
+def write_comment(db: Session, place_id: int, payload: schemas.CommentCreate) -> schemas.CommentOut:
     place_exists = db.query(models.Place.id).filter(models.Place.id == place_id).first()
     if not place_exists:
         raise HTTPException(status_code=404, detail="Place not found")
     obj = models.Comment(place_id=place_id, author=payload.author, content=payload.content)
     db.add(obj)
-    db.commit()
-    db.refresh(obj)
-    return obj
-
+    # id and the server-side created_at come back through INSERT ... RETURNING
+    db.flush()
+    return schemas.CommentOut.model_validate(obj)
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from ..database import get_db
 from .. import models, schemas
+from ..pagination import MAX_PAGE_SIZE, keyset_page, set_next_cursor
+from ..writer import run_write
 
 
 router = APIRouter(prefix="/api/contacts", tags=["contacts"])
@@ -11,15 +13,28 @@ router = APIRouter(prefix="/api/contacts", tags=["contacts"])
 
 @router.post("/", response_model=schemas.ContactOut, status_code=201)
 def create_contact(payload: schemas.ContactCreate, db: Session = Depends(get_db)):
+    return run_write(db, write_contact, payload=payload)
+
+
+def write_contact(db: Session, payload: schemas.ContactCreate) -> schemas.ContactOut:
     obj = models.ContactMessage(name=payload.name, email=str(payload.email), message=payload.message)
     db.add(obj)
-    db.commit()
-    db.refresh(obj)
-    return obj
+    # id and the server-side created_at come back through INSERT ... RETURNING
+    db.flush()
+    return schemas.ContactOut.model_validate(obj)
 
 
 @router.get("/", response_model=List[schemas.ContactOut])
-def list_contacts(db: Session = Depends(get_db)):
+def list_contacts(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
     # Simple list endpoint to verify data in admin/dev; in prod you might secure it.
-    return db.query(models.ContactMessage).order_by(models.ContactMessage.id.desc()).all()
+    rows, next_cursor = keyset_page(
+        db.query(models.ContactMessage), models.ContactMessage.id, cursor, limit, descending=True
+    )
+    set_next_cursor(response, next_cursor)
+    return rows
 
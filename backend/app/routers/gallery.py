@@ -1,20 +1,69 @@
-import os
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, Request
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from ..database import get_db
 from .. import models, schemas
 from ..auth import get_current_user, get_optional_user, require_admin
-from sqlalchemy import func
+from ..cache import cached_response, response_cache, store_body, store_response
+from ..fastjson import enabled as fast_json_enabled, encode_rows, schema_columns
+from ..pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, keyset_page
+from ..reactions import MAX_BATCH_IDS, apply_image_reaction, image_reactions, parse_ids
+from ..images import delete_variants, schedule_variants
+from ..storage import StagedUpload, delete_blob, discard, local_path, publish, stage_upload
+from ..versions import conditional
+from ..writer import run_write
 
 
 router = APIRouter(prefix="/api/gallery", tags=["gallery"])
 
+_gallery_list = TypeAdapter(List[schemas.GalleryOut])
+# Row-tuple fast path for the list (see fastjson.py)
+_GALLERY_OUT_COLUMNS = schema_columns(schemas.GalleryOut, models.GalleryImage)
+_GALLERY_TRANSFORMS = {
+    # Same shape as List[ImageVariant]: known keys only, in field order; NULL -> []
+    "variants": lambda variants: [{k: v[k] for k in schemas.ImageVariant.model_fields} for v in variants or ()],
+}
+
 
 @router.get("/", response_model=List[schemas.GalleryOut])
-def list_gallery(db: Session = Depends(get_db)):
-    return db.query(models.GalleryImage).order_by(models.GalleryImage.id.desc()).all()
+def list_gallery(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    cond = conditional(request, db, "gallery")
+    if cond.not_modified:
+        return cond.response_304()
+    cached = cached_response(cond)
+    if cached is not None:
+        return cached
+    fast = fast_json_enabled()
+    query = db.query(*_GALLERY_OUT_COLUMNS) if fast else db.query(models.GalleryImage)
+    rows, next_cursor = keyset_page(query, models.GalleryImage.id, cursor, limit, descending=True)
+    headers = {NEXT_CURSOR_HEADER: next_cursor}
+    if fast:
+        return store_body(cond, ("gallery",), encode_rows(_GALLERY_OUT_COLUMNS, rows, _GALLERY_TRANSFORMS), headers)
+    return store_response(cond, ("gallery",), _gallery_list, rows, headers)
+
+
+@router.get("/reactions", response_model=Dict[int, schemas.ReactionOut])
+def get_images_reactions_batch(
+    ids: str,
+    client_id: str | None = None,
+    db: Session = Depends(get_db),
+    current_user: models.User | None = Depends(get_optional_user),
+):
+    """Reactions for many images at once: ``?ids=1,2,3`` -> ``{id: {likes, dislikes, my}}``."""
+    try:
+        image_ids = parse_ids(ids)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if len(image_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    return image_reactions(db, image_ids, user_id=current_user.id if current_user else None, client_id=client_id)
 
 
 @router.post("/url", response_model=schemas.GalleryOut, status_code=201)
@@ -24,15 +73,11 @@ def add_gallery_by_url(payload: schemas.GalleryCreateUrl, db: Session = Depends(
     obj = models.GalleryImage(title=payload.title, image_url=payload.image_url, created_by=admin.id)
     db.add(obj)
     db.commit()
+    response_cache.invalidate("gallery")
     db.refresh(obj)
     return obj
 
 
-UPLOAD_DIR = os.environ.get("CT_UPLOAD_DIR") or os.path.join(os.path.dirname(__file__), "..", "uploads")
-UPLOAD_DIR = os.path.abspath(UPLOAD_DIR)
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-
 @router.post("/upload", response_model=schemas.GalleryOut, status_code=201)
 def upload_gallery_image(
     file: UploadFile = File(...),
@@ -40,26 +85,34 @@ def upload_gallery_image(
     db: Session = Depends(get_db),
     admin: models.User = Depends(require_admin),
 ):
-    # Save file
-    filename = file.filename or "upload.jpg"
-    safe_name = filename.replace("/", "_").replace("\\", "_")
-    filepath = os.path.join(UPLOAD_DIR, safe_name)
-    # Avoid overwriting: add suffix if exists
-    base, ext = os.path.splitext(filepath)
-    i = 1
-    final_path = filepath
-    while os.path.exists(final_path):
-        final_path = f"{base}_{i}{ext}"
-        i += 1
-    with open(final_path, 'wb') as out:
-        out.write(file.file.read())
-
-    # Public URL path (served under /uploads)
-    public_url = "/uploads/" + os.path.basename(final_path)
-    obj = models.GalleryImage(title=title, image_url=public_url, created_by=admin.id)
+    # Stream into content-addressed storage; identical bytes reuse the existing blob
+    staged = stage_upload(file.file, file.filename)
+    return record_upload(title, staged, db=db, admin=admin)
+
+
+def record_upload(title: Optional[str], staged: StagedUpload, db: Session, admin: models.User):
+    try:
+        # Publish under the write lock taken at BEGIN, so delete_image cannot
+        # unlink a shared blob between this check and the row's commit
+        db.connection()
+        stored = publish(staged)
+    finally:
+        discard(staged.tmp_path)
+    obj = models.GalleryImage(title=title, image_url=stored.url, content_hash=stored.sha256, created_by=admin.id)
+    # Duplicate content shares its blob, so it can share already rendered variants too
+    done = (
+        db.query(models.GalleryImage.variants, models.GalleryImage.placeholder)
+        .filter(models.GalleryImage.content_hash == stored.sha256, models.GalleryImage.variants.isnot(None))
+        .first()
+    )
+    if done:
+        obj.variants, obj.placeholder = done
     db.add(obj)
     db.commit()
+    response_cache.invalidate("gallery")
     db.refresh(obj)
+    if not done:
+        schedule_variants(obj.id, obj.image_url, stored.sha256)
     return obj
 
 
@@ -68,21 +121,30 @@ def delete_image(image_id: int, db: Session = Depends(get_db), admin: models.Use
     img = db.query(models.GalleryImage).filter(models.GalleryImage.id == image_id).first()
     if not img:
         raise HTTPException(status_code=404, detail="Image not found")
-    # Try deleting file if it's a local upload
-    try:
-        if img.image_url and img.image_url.startswith("/uploads/"):
-            fname = os.path.basename(img.image_url)
-            fpath = os.path.join(UPLOAD_DIR, fname)
-            if os.path.exists(fpath):
-                os.remove(fpath)
-    except Exception:
-        # Ignore file delete errors
-        pass
+    image_url, content_hash, variants = img.image_url, img.content_hash, img.variants
     db.delete(img)
+    db.flush()
+    # Still inside the write transaction: an upload of the same bytes either
+    # committed its row already (and is seen here) or publishes after this
+    # commit and finds the file gone. If the commit fails after the unlink,
+    # the row keeps a missing file; that beats a new row pointing at nothing.
+    # Uploaded blobs are shared by duplicate uploads: drop the file with its last reference
+    if local_path(image_url) and not _still_used(db, models.GalleryImage.image_url == image_url):
+        delete_blob(image_url)
+    # Variants are keyed by content hash alone, so the same bytes uploaded
+    # under another extension (another blob URL) still use them
+    if variants and not _still_used(db, models.GalleryImage.content_hash == content_hash if content_hash
+                                    else models.GalleryImage.image_url == image_url):
+        delete_variants(variants)
     db.commit()
+    response_cache.invalidate("gallery")
     return None
 
 
+def _still_used(db: Session, condition) -> bool:
+    return db.query(models.GalleryImage.id).filter(condition).first() is not None
+
+
 @router.get("/{image_id}/reactions", response_model=schemas.ReactionOut)
 def get_image_reactions(
     image_id: int,
@@ -90,26 +152,7 @@ def get_image_reactions(
     db: Session = Depends(get_db),
     current_user: models.User | None = Depends(get_optional_user),
 ):
-    likes = db.query(func.count(models.GalleryReaction.id)).filter(models.GalleryReaction.image_id == image_id, models.GalleryReaction.value == 1).scalar() or 0
-    dislikes = db.query(func.count(models.GalleryReaction.id)).filter(models.GalleryReaction.image_id == image_id, models.GalleryReaction.value == -1).scalar() or 0
-    my = None
-    if current_user:
-        rec = (
-            db.query(models.GalleryReaction)
-            .filter(models.GalleryReaction.image_id == image_id, models.GalleryReaction.user_id == current_user.id)
-            .first()
-        )
-        if rec:
-            my = rec.value
-    elif client_id:
-        rec = (
-            db.query(models.GalleryReaction)
-            .filter(models.GalleryReaction.image_id == image_id, models.GalleryReaction.client_id == client_id)
-            .first()
-        )
-        if rec:
-            my = rec.value
-    return {"likes": likes, "dislikes": dislikes, "my": my}
+    return image_reactions(db, [image_id], user_id=current_user.id if current_user else None, client_id=client_id)[image_id]
 
 
 @router.put("/{image_id}/react", response_model=schemas.ReactionOut)
@@ -119,37 +162,16 @@ def react_image(
     db: Session = Depends(get_db),
     current_user: models.User | None = Depends(get_optional_user),
 ):
+    return run_write(db, write_image_reaction, ("gallery",), image_id=image_id, payload=payload, current_user=current_user)
+
+
+def write_image_reaction(db: Session, image_id: int, payload: schemas.ReactionIn, current_user) -> dict:
     img_exists = db.query(models.GalleryImage.id).filter(models.GalleryImage.id == image_id).first()
     if not img_exists:
         raise HTTPException(status_code=404, detail="Image not found")
     client_id = (payload.client_id or "").strip() or None
     if not current_user and not client_id:
         raise HTTPException(status_code=400, detail="client_id is required for anonymous reactions")
-    if current_user:
-        rec = (
-            db.query(models.GalleryReaction)
-            .filter(models.GalleryReaction.image_id == image_id, models.GalleryReaction.user_id == current_user.id)
-            .first()
-        )
-    else:
-        rec = (
-            db.query(models.GalleryReaction)
-            .filter(models.GalleryReaction.image_id == image_id, models.GalleryReaction.client_id == client_id)
-            .first()
-        )
-    if rec and rec.value == payload.value:
-        db.delete(rec)
-    elif rec:
-        rec.value = payload.value
-        db.add(rec)
-    else:
-        db.add(
-            models.GalleryReaction(
-                image_id=image_id,
-                user_id=current_user.id if current_user else None,
-                client_id=None if current_user else client_id,
-                value=payload.value,
-            )
-        )
-    db.commit()
-    return get_image_reactions(image_id, db=db, current_user=current_user, client_id=client_id)
+    user_id = current_user.id if current_user else None
+    apply_image_reaction(db, image_id, payload.value, user_id=user_id, client_id=client_id)
+    return image_reactions(db, [image_id], user_id=user_id, client_id=client_id)[image_id]
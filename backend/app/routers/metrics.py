@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+from ..metrics import CONTENT_TYPE, collect_gauges, registry
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    # async: gauges read the event loop's threadpool limiter, and scraping must not wait for a worker thread
+    return PlainTextResponse(registry.render(collect_gauges(getattr(request.app.state, "startup", None))), media_type=CONTENT_TYPE)
@@ -1,27 +1,178 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Optional
 
 from ..database import get_db
 from .. import models, schemas
 from ..auth import get_current_user, get_optional_user, require_admin
-from sqlalchemy import func
+from ..cache import cached_response, response_cache, store_body, store_response
+from ..clusters import clusters_in_bbox
+from ..fastjson import enabled as fast_json_enabled, encode_rows, schema_columns
+from ..geo import filter_bbox, nearby_places, parse_bbox
+from ..pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, keyset_page
+from ..reactions import MAX_BATCH_IDS, apply_place_reaction, my_reaction, parse_ids, place_reactions
+from ..versions import conditional
+from ..writer import run_write
 
 
 router = APIRouter(prefix="/api/places", tags=["places"])
 
+_place_list = TypeAdapter(List[schemas.PlaceOut])
+_place_detail = TypeAdapter(schemas.PlaceDetail)
+_place_clusters = TypeAdapter(schemas.PlaceClusters)
+# Row-tuple fast path for the list (see fastjson.py)
+_PLACE_OUT_COLUMNS = schema_columns(schemas.PlaceOut, models.Place)
+
+# Comments embedded in PlaceDetail / PlacePage; the cursor continues on /api/comments/place/{id}
+PLACE_COMMENTS_PAGE = 20
+
 
 @router.get("/", response_model=List[schemas.PlaceOut])
-def list_places(db: Session = Depends(get_db)):
-    return db.query(models.Place).order_by(models.Place.id.asc()).all()
+def list_places(
+    request: Request,
+    bbox: Optional[str] = Query(None, description="minLon,minLat,maxLon,maxLat"),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    cond = conditional(request, db, "places")
+    if cond.not_modified:
+        return cond.response_304()
+    cached = cached_response(cond)
+    if cached is not None:
+        return cached
+    fast = fast_json_enabled()
+    query = db.query(*_PLACE_OUT_COLUMNS) if fast else db.query(models.Place)
+    if bbox:
+        query = filter_bbox(query, parse_bbox(bbox))
+    rows, next_cursor = keyset_page(query, models.Place.id, cursor, limit)
+    headers = {NEXT_CURSOR_HEADER: next_cursor}
+    if fast:
+        return store_body(cond, ("places",), encode_rows(_PLACE_OUT_COLUMNS, rows), headers)
+    return store_response(cond, ("places",), _place_list, rows, headers)
+
+
+@router.get("/nearby", response_model=List[schemas.PlaceNearbyOut])
+def list_nearby_places(
+    request: Request,
+    response: Response,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5.0, gt=0, le=1000),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    cond = conditional(request, db, "places")
+    if cond.not_modified:
+        return cond.response_304()
+    cond.apply(response)
+    return [
+        schemas.PlaceNearbyOut(**schemas.PlaceOut.model_validate(place).model_dump(), distance_km=round(dist, 3))
+        for place, dist in nearby_places(db, lat, lon, radius_km, limit)
+    ]
+
+
+@router.get("/clusters", response_model=schemas.PlaceClusters)
+def list_place_clusters(
+    request: Request,
+    bbox: str = Query(..., description="minLon,minLat,maxLon,maxLat"),
+    zoom: int = Query(..., ge=0, le=22),
+    db: Session = Depends(get_db),
+):
+    cond = conditional(request, db, "places")
+    if cond.not_modified:
+        return cond.response_304()
+    cached = cached_response(cond)
+    if cached is not None:
+        return cached
+    return store_response(cond, ("places",), _place_clusters, clusters_in_bbox(db, parse_bbox(bbox), zoom))
+
+
+@router.get("/reactions", response_model=Dict[int, schemas.ReactionOut])
+def get_places_reactions_batch(
+    ids: str,
+    client_id: str | None = None,
+    db: Session = Depends(get_db),
+    current_user: models.User | None = Depends(get_optional_user),
+):
+    """Reactions for many places at once: ``?ids=1,2,3`` -> ``{id: {likes, dislikes, my}}``."""
+    try:
+        place_ids = parse_ids(ids)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if len(place_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    return place_reactions(db, place_ids, user_id=current_user.id if current_user else None, client_id=client_id)
 
 
 @router.get("/{place_id}", response_model=schemas.PlaceDetail)
-def get_place(place_id: int, db: Session = Depends(get_db)):
+def get_place(place_id: int, request: Request, db: Session = Depends(get_db)):
+    cond = conditional(request, db, "places", "comments")
+    if cond.not_modified:
+        return cond.response_304()
+    cached = cached_response(cond)
+    if cached is not None:
+        return cached
     place = db.query(models.Place).filter(models.Place.id == place_id).first()
     if not place:
         raise HTTPException(status_code=404, detail="Place not found")
-    return place
+    return store_response(cond, ("places", "comments"), _place_detail, _place_detail_data(db, place, PLACE_COMMENTS_PAGE))
+
+
+@router.get("/{place_id}/page", response_model=schemas.PlacePage)
+def get_place_page(
+    place_id: int,
+    client_id: str | None = None,
+    comments_limit: int = Query(PLACE_COMMENTS_PAGE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: models.User | None = Depends(get_optional_user),
+):
+    """The place, its newest comments, reaction counts, the caller's reaction and its neighbours.
+
+    Three queries at most: the place row with its neighbour ids, one page of
+    comments and the caller's own reaction. Not cached: the reaction is personal.
+    """
+    prev_id = (
+        db.query(func.max(models.Place.id)).filter(models.Place.id < place_id).scalar_subquery()
+    )
+    next_id = (
+        db.query(func.min(models.Place.id)).filter(models.Place.id > place_id).scalar_subquery()
+    )
+    row = (
+        db.query(models.Place, prev_id, next_id)
+        .filter(models.Place.id == place_id)
+        .first()
+    )
+    if not row:
+        raise HTTPException(status_code=404, detail="Place not found")
+    place, prev_place, next_place = row
+    user_id = current_user.id if current_user else None
+    data = _place_detail_data(db, place, comments_limit)
+    data["reactions"] = {
+        "likes": place.likes or 0,
+        "dislikes": place.dislikes or 0,
+        "my": my_reaction(db, models.PlaceReaction, models.PlaceReaction.place_id, place_id, user_id, client_id),
+    }
+    data["prev_id"] = prev_place
+    data["next_id"] = next_place
+    return data
+
+
+def _place_detail_data(db: Session, place: models.Place, comments_limit: int) -> dict:
+    # Served by the (place_id, id) index on comments, like list_comments_for_place
+    comments, next_cursor = keyset_page(
+        db.query(models.Comment).filter(models.Comment.place_id == place.id),
+        models.Comment.id,
+        None,
+        comments_limit,
+        descending=True,
+    )
+    data = schemas.PlaceOut.model_validate(place).model_dump()
+    data["comments"] = comments
+    data["comments_next_cursor"] = next_cursor
+    return data
 
 
 @router.post("/", response_model=schemas.PlaceOut, status_code=201)
@@ -30,16 +181,20 @@ def create_place(
     db: Session = Depends(get_db),
     admin: models.User = Depends(require_admin),
 ):
+    if place.external_id and db.query(models.Place.id).filter(models.Place.external_id == place.external_id).first():
+        raise HTTPException(status_code=409, detail="A place with this external_id already exists")
     obj = models.Place(
         name=place.name,
         description=place.description,
         latitude=place.latitude,
         longitude=place.longitude,
         image_url=place.image_url,
+        external_id=place.external_id,
         created_by=admin.id,
     )
     db.add(obj)
     db.commit()
+    response_cache.invalidate("places")
     db.refresh(obj)
     return obj
 
@@ -62,6 +217,7 @@ def update_place(
         setattr(place, k, v)
     db.add(place)
     db.commit()
+    response_cache.invalidate("places")
     db.refresh(place)
     return place
 
@@ -73,26 +229,7 @@ def get_place_reactions(
     db: Session = Depends(get_db),
     current_user: models.User | None = Depends(get_optional_user),
 ):
-    likes = db.query(func.count(models.PlaceReaction.id)).filter(models.PlaceReaction.place_id == place_id, models.PlaceReaction.value == 1).scalar() or 0
-    dislikes = db.query(func.count(models.PlaceReaction.id)).filter(models.PlaceReaction.place_id == place_id, models.PlaceReaction.value == -1).scalar() or 0
-    my = None
-    if current_user:
-        rec = (
-            db.query(models.PlaceReaction)
-            .filter(models.PlaceReaction.place_id == place_id, models.PlaceReaction.user_id == current_user.id)
-            .first()
-        )
-        if rec:
-            my = rec.value
-    elif client_id:
-        rec = (
-            db.query(models.PlaceReaction)
-            .filter(models.PlaceReaction.place_id == place_id, models.PlaceReaction.client_id == client_id)
-            .first()
-        )
-        if rec:
-            my = rec.value
-    return {"likes": likes, "dislikes": dislikes, "my": my}
+    return place_reactions(db, [place_id], user_id=current_user.id if current_user else None, client_id=client_id)[place_id]
 
 
 @router.put("/{place_id}/react", response_model=schemas.ReactionOut)
@@ -102,41 +239,20 @@ def react_place(
     db: Session = Depends(get_db),
     current_user: models.User | None = Depends(get_optional_user),
 ):
+    return run_write(db, write_place_reaction, ("places",), place_id=place_id, payload=payload, current_user=current_user)
+
+
+def write_place_reaction(db: Session, place_id: int, payload: schemas.ReactionIn, current_user) -> dict:
     place_exists = db.query(models.Place.id).filter(models.Place.id == place_id).first()
     if not place_exists:
         raise HTTPException(status_code=404, detail="Place not found")
     client_id = (payload.client_id or "").strip() or None
     if not current_user and not client_id:
         raise HTTPException(status_code=400, detail="client_id is required for anonymous reactions")
-    if current_user:
-        rec = (
-            db.query(models.PlaceReaction)
-            .filter(models.PlaceReaction.place_id == place_id, models.PlaceReaction.user_id == current_user.id)
-            .first()
-        )
-    else:
-        rec = (
-            db.query(models.PlaceReaction)
-            .filter(models.PlaceReaction.place_id == place_id, models.PlaceReaction.client_id == client_id)
-            .first()
-        )
-    if rec and rec.value == payload.value:
-        db.delete(rec)
-    elif rec:
-        rec.value = payload.value
-        db.add(rec)
-    else:
-        db.add(
-            models.PlaceReaction(
-                place_id=place_id,
-                user_id=current_user.id if current_user else None,
-                client_id=None if current_user else client_id,
-                value=payload.value,
-            )
-        )
-    db.commit()
+    user_id = current_user.id if current_user else None
+    apply_place_reaction(db, place_id, payload.value, user_id=user_id, client_id=client_id)
     # Return updated counts
-    return get_place_reactions(place_id, db=db, current_user=current_user, client_id=client_id)
+    return place_reactions(db, [place_id], user_id=user_id, client_id=client_id)[place_id]
 
 
 @router.delete("/{place_id}", status_code=204)
@@ -148,4 +264,5 @@ def delete_place(place_id: int, db: Session = Depends(get_db), current_user: mod
         raise HTTPException(status_code=403, detail="Not allowed to delete this place")
     db.delete(place)
     db.commit()
+    response_cache.invalidate("places", "comments")
     return None
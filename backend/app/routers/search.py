@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Literal
+
+from ..database import get_db
+from .. import schemas
+from ..search import search as run_search
+
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("/", response_model=List[schemas.SearchHit])
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Literal["all", "places", "comments"] = "all",
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    return run_search(db, q, kind=type, limit=limit)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, field_validator
 from typing import Optional, List
 from datetime import datetime
 
@@ -25,6 +25,8 @@ class PlaceBase(BaseModel):
     latitude: float
     longitude: float
     image_url: Optional[str] = None
+    # Identifier from an imported dataset, unique when set
+    external_id: Optional[str] = Field(None, min_length=1, max_length=100)
 
 
 class PlaceCreate(PlaceBase):
@@ -34,13 +36,45 @@ class PlaceCreate(PlaceBase):
 class PlaceOut(PlaceBase):
     id: int
     created_by: Optional[int] = None
+    likes: int = 0
+    dislikes: int = 0
 
     class Config:
         from_attributes = True
 
 
+class PlaceNearbyOut(PlaceOut):
+    distance_km: float
+
+
+class MapPoint(BaseModel):
+    id: int
+    name: str
+    latitude: float
+    longitude: float
+
+    class Config:
+        from_attributes = True
+
+
+class PlaceCluster(BaseModel):
+    # Centroid of the places in one grid cell
+    latitude: float
+    longitude: float
+    count: int
+
+
+class PlaceClusters(BaseModel):
+    zoom: int
+    clusters: List[PlaceCluster] = []
+    # Places alone in their cell, or every place past the last clustered zoom
+    points: List[MapPoint] = []
+
+
 class PlaceDetail(PlaceOut):
+    # Newest comments first, capped; fetch the rest from /api/comments/place/{id}?cursor=
     comments: List[CommentOut] = []
+    comments_next_cursor: Optional[str] = None
 
 
 class PlaceUpdate(BaseModel):
@@ -102,11 +136,27 @@ class GalleryCreateUrl(BaseModel):
     image_url: str
 
 
+class ImageVariant(BaseModel):
+    width: int
+    height: int
+    url: str
+
+
 class GalleryOut(BaseModel):
     id: int
     title: Optional[str]
     image_url: str
     created_at: datetime
+    likes: int = 0
+    dislikes: int = 0
+    # Empty until the variant pipeline has processed the upload
+    variants: List[ImageVariant] = []
+    placeholder: Optional[str] = None
+
+    @field_validator("variants", mode="before")
+    @classmethod
+    def _null_variants(cls, v):
+        return v or []
 
     class Config:
         from_attributes = True
@@ -132,3 +182,38 @@ class ReactionOut(BaseModel):
     likes: int
     dislikes: int
     my: Optional[int] = None
+
+
+class PlacePage(PlaceDetail):
+    """Everything the place page needs in one response."""
+    reactions: ReactionOut
+    prev_id: Optional[int] = None
+    next_id: Optional[int] = None
+
+
+# Search
+class SearchHit(BaseModel):
+    type: str  # "place" or "comment"
+    id: int
+    place_id: int
+    title: str
+    snippet: str
+    score: float
+
+
+# Admin bulk import
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    processed: int
+    inserted: int
+    updated: int
+    # Rows replaced by a later row with the same upsert key in the same file
+    superseded: int = 0
+    failed: int
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
+    dry_run: bool = False
@@ -0,0 +1,141 @@
+"""Full-text search over places and comments using SQLite FTS5."""
+import html
+import re
+from itertools import zip_longest
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+# Sentinels wrapped around matches by snippet(); swapped for <mark> after escaping
+_HL_START = "\x02"
+_HL_END = "\x03"
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+FTS_TABLES = ("places_fts", "comments_fts")
+
+
+def _create_statements() -> list[str]:
+    return [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5(
+            name, description,
+            content='places', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        # Name matches outrank description matches
+        "INSERT INTO places_fts(places_fts, rank) VALUES('rank', 'bm25(10.0, 1.0)')",
+        """CREATE TRIGGER IF NOT EXISTS places_fts_ai AFTER INSERT ON places BEGIN
+            INSERT INTO places_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS places_fts_ad AFTER DELETE ON places BEGIN
+            INSERT INTO places_fts(places_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS places_fts_au AFTER UPDATE OF name, description ON places BEGIN
+            INSERT INTO places_fts(places_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO places_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+        END""",
+        """CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+            content,
+            content='comments', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS comments_fts_ai AFTER INSERT ON comments BEGIN
+            INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS comments_fts_ad AFTER DELETE ON comments BEGIN
+            INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS comments_fts_au AFTER UPDATE OF content ON comments BEGIN
+            INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content);
+        END""",
+    ]
+
+
+def setup_index(conn) -> None:
+    """Create the FTS tables and triggers; populate them on first creation."""
+    existing = {
+        row[0]
+        for row in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('places_fts', 'comments_fts')"
+        ).fetchall()
+    }
+    for stmt in _create_statements():
+        conn.exec_driver_sql(stmt)
+    for table in FTS_TABLES:
+        if table not in existing:
+            conn.exec_driver_sql(f"INSERT INTO {table}({table}) VALUES('rebuild')")
+
+
+def rebuild_index(db: Session) -> None:
+    """Regenerate both indexes from the base tables and merge their segments. Commits."""
+    for table in FTS_TABLES:
+        db.execute(text(f"INSERT INTO {table}({table}) VALUES('rebuild')"))
+        db.execute(text(f"INSERT INTO {table}({table}) VALUES('optimize')"))
+    db.commit()
+
+
+def build_match(q: str) -> str | None:
+    """Turn free text into an FTS5 query: AND of quoted terms, last term as prefix.
+
+    A one-character last term is matched exactly; as a prefix it would match
+    most of the index and make ranking expensive.
+    """
+    tokens = _TOKEN_RE.findall(q)
+    if not tokens:
+        return None
+    terms = [f'"{tok}"' for tok in tokens]
+    if len(tokens[-1]) >= 2:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _highlight(snippet: str) -> str:
+    return html.escape(snippet or "").replace(_HL_START, "<mark>").replace(_HL_END, "</mark>")
+
+
+def search(db: Session, q: str, kind: str = "all", limit: int = 20) -> list[dict]:
+    """Search places and/or comments, best matches first.
+
+    ``snippet`` is HTML-escaped text with matches wrapped in ``<mark>``.
+    ``score`` is the negated bm25 rank, so larger is better. bm25 depends on
+    each index's own document statistics, so scores only compare within one
+    type. With ``kind="all"`` the two lists are interleaved by rank (best
+    place, best comment, second place, ...) instead of sorted by score.
+    """
+    match = build_match(q)
+    if not match:
+        return []
+    places: list[dict] = []
+    comments: list[dict] = []
+    params = {"match": match, "limit": limit, "hs": _HL_START, "he": _HL_END}
+    if kind in ("all", "places"):
+        rows = db.execute(
+            text(
+                """SELECT p.id, p.name, snippet(places_fts, -1, :hs, :he, '…', 16), places_fts.rank
+                FROM places_fts JOIN places p ON p.id = places_fts.rowid
+                WHERE places_fts MATCH :match
+                ORDER BY places_fts.rank LIMIT :limit"""
+            ),
+            params,
+        ).all()
+        for pid, name, snip, rank in rows:
+            places.append({"type": "place", "id": pid, "place_id": pid, "title": name, "snippet": _highlight(snip), "score": -rank})
+    if kind in ("all", "comments"):
+        rows = db.execute(
+            text(
+                """SELECT c.id, c.place_id, p.name, snippet(comments_fts, 0, :hs, :he, '…', 16), comments_fts.rank
+                FROM comments_fts
+                JOIN comments c ON c.id = comments_fts.rowid
+                JOIN places p ON p.id = c.place_id
+                WHERE comments_fts MATCH :match
+                ORDER BY comments_fts.rank LIMIT :limit"""
+            ),
+            params,
+        ).all()
+        for cid, pid, name, snip, rank in rows:
+            comments.append({"type": "comment", "id": cid, "place_id": pid, "title": name, "snippet": _highlight(snip), "score": -rank})
+    hits = [hit for pair in zip_longest(places, comments) for hit in pair if hit is not None]
+    return hits[:limit]
@@ -0,0 +1,109 @@
+"""Content-addressed storage for uploaded files."""
+import hashlib
+import os
+import re
+import tempfile
+from typing import BinaryIO, NamedTuple
+
+from fastapi import HTTPException
+
+
+UPLOAD_DIR = os.path.abspath(os.environ.get("CT_UPLOAD_DIR") or os.path.join(os.path.dirname(__file__), "uploads"))
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+PUBLIC_PREFIX = "/uploads/"
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.environ.get("CT_MAX_UPLOAD_MB", "20")) * 1024 * 1024
+
+_EXT_RE = re.compile(r"^\.[a-z0-9]{1,10}$")
+
+
+class StoredBlob(NamedTuple):
+    url: str
+    sha256: str
+    size: int
+    created: bool  # False when identical content was already stored
+
+
+def _safe_ext(filename: str | None) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if _EXT_RE.match(ext) else ".bin"
+
+
+def blob_relpath(sha256: str, ext: str) -> str:
+    return os.path.join(sha256[:2], sha256[2:4], sha256 + ext)
+
+
+class StagedUpload(NamedTuple):
+    tmp_path: str
+    rel: str
+    sha256: str
+    size: int
+
+
+def stage_upload(src: BinaryIO, filename: str | None, max_bytes: int = MAX_UPLOAD_BYTES) -> StagedUpload:
+    """Stream ``src`` to a temp file while hashing it. Raises 413 past ``max_bytes``."""
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(prefix=".upload-", dir=UPLOAD_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"File exceeds {max_bytes // (1024 * 1024)} MB limit")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        discard(tmp_path)
+        raise
+    sha = digest.hexdigest()
+    return StagedUpload(tmp_path, blob_relpath(sha, _safe_ext(filename)), sha, size)
+
+
+def publish(staged: StagedUpload) -> StoredBlob:
+    """Move a staged upload to its content address, or reuse the identical blob already there.
+
+    Call it inside the write transaction that records the row, so it cannot race
+    ``delete_image`` removing the same blob.
+    """
+    final_path = os.path.join(UPLOAD_DIR, staged.rel)
+    created = not os.path.exists(final_path)
+    if created:
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        # Atomic; a concurrent upload of the same bytes just replaces an identical file
+        os.replace(staged.tmp_path, final_path)
+    else:
+        discard(staged.tmp_path)
+    return StoredBlob(PUBLIC_PREFIX + staged.rel.replace(os.sep, "/"), staged.sha256, staged.size, created)
+
+
+def discard(tmp_path: str) -> None:
+    """Remove a staged temp file if it is still there."""
+    try:
+        os.remove(tmp_path)
+    except FileNotFoundError:
+        pass
+
+
+def local_path(url: str | None) -> str | None:
+    """Filesystem path for a ``/uploads/...`` URL, or None for external/unsafe URLs."""
+    if not url or not url.startswith(PUBLIC_PREFIX):
+        return None
+    path = os.path.abspath(os.path.join(UPLOAD_DIR, url[len(PUBLIC_PREFIX):]))
+    if not path.startswith(UPLOAD_DIR + os.sep):
+        return None
+    return path
+
+
+def delete_blob(url: str | None) -> None:
+    """Remove a stored file; errors are ignored."""
+    path = local_path(url)
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError:
+        pass
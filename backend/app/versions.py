@@ -0,0 +1,98 @@
+"""Collection version markers and conditional GET (ETag / Last-Modified) support."""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+
+
+# collection name -> table whose writes bump it
+COLLECTIONS = {
+    "places": "places",
+    "gallery": "gallery_images",
+    "comments": "comments",
+}
+
+# Request scope "state" key holding the ETag a Conditional issued; the
+# compression middleware only caches bodies carrying that ETag
+SCOPE_ETAG_KEY = "conditional_etag"
+
+_NOW_SQL = "strftime('%Y-%m-%dT%H:%M:%SZ', 'now')"
+
+
+def setup_statements() -> list[str]:
+    stmts = []
+    for name, table in COLLECTIONS.items():
+        stmts.append(
+            f"INSERT OR IGNORE INTO collection_versions (name, version, updated_at) VALUES ('{name}', 1, {_NOW_SQL})"
+        )
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            stmts.append(
+                f"""CREATE TRIGGER IF NOT EXISTS {table}_version_{op.lower()} AFTER {op} ON {table} BEGIN
+                    UPDATE collection_versions SET version = version + 1, updated_at = {_NOW_SQL}
+                    WHERE name = '{name}';
+                END"""
+            )
+    return stmts
+
+
+def get_versions(db: Session, *names: str) -> dict[str, tuple[int, str]]:
+    """``{name: (version, updated_at)}`` for the requested collections, in one query."""
+    rows = db.execute(
+        select(models.CollectionVersion.name, models.CollectionVersion.version, models.CollectionVersion.updated_at)
+        .where(models.CollectionVersion.name.in_(names))
+    ).all()
+    return {name: (version, updated_at) for name, version, updated_at in rows}
+
+
+class Conditional:
+    """Validators for one read request over one or more collections."""
+
+    def __init__(self, request: Request, versions: dict[str, tuple[int, str]], names: tuple[str, ...]):
+        self.request = request
+        parts = [f"{name}:{versions.get(name, (0, ''))[0]}" for name in names]
+        variant = request.url.path + "?" + "&".join(sorted(request.url.query.split("&")))
+        digest = hashlib.blake2b(("|".join(parts) + "|" + variant).encode(), digest_size=12).hexdigest()
+        self.etag = f'"{digest}"'
+        request.scope.setdefault("state", {})[SCOPE_ETAG_KEY] = self.etag
+        stamps = [versions[name][1] for name in names if name in versions and versions[name][1]]
+        self.last_modified: Optional[datetime] = None
+        if stamps:
+            self.last_modified = datetime.strptime(max(stamps), "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.last_modified:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    @property
+    def not_modified(self) -> bool:
+        inm = self.request.headers.get("if-none-match")
+        if inm is not None:
+            # Weak comparison, as RFC 9110 requires for If-None-Match
+            tags = {tag.strip().removeprefix("W/") for tag in inm.split(",")}
+            return "*" in tags or self.etag in tags
+        ims = self.request.headers.get("if-modified-since")
+        if ims and self.last_modified:
+            try:
+                return self.last_modified <= parsedate_to_datetime(ims)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def response_304(self) -> Response:
+        return Response(status_code=304, headers=self.headers)
+
+    def apply(self, response: Response) -> None:
+        response.headers.update(self.headers)
+
+
+def conditional(request: Request, db: Session, *names: str) -> Conditional:
+    return Conditional(request, get_versions(db, *names), names)
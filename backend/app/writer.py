@@ -0,0 +1,181 @@
+"""Write path for small, frequent writes, with optional group commit."""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Iterable, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from .cache import response_cache
+from .database import DB_PROFILE, SessionLocal
+
+
+logger = logging.getLogger(__name__)
+
+GROUP_COMMIT = os.environ.get("CT_GROUP_COMMIT", "0").lower() in ("1", "true", "yes", "on")
+WINDOW_MS = float(os.environ.get("CT_GROUP_COMMIT_WINDOW_MS", "0"))
+MAX_BATCH = int(os.environ.get("CT_GROUP_COMMIT_MAX", "64"))
+MAX_QUEUE = int(os.environ.get("CT_GROUP_COMMIT_QUEUE", "10000"))
+WAIT_TIMEOUT = float(os.environ.get("CT_GROUP_COMMIT_TIMEOUT_S", "30"))
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    def __init__(self, session_factory=SessionLocal, window: float = WINDOW_MS / 1000,
+                 max_batch: int = MAX_BATCH, max_queue: int = MAX_QUEUE):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self._queue: "queue.Queue" = queue.Queue(max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.writes = 0
+
+    def submit(self, fn: Callable, tags: Iterable[str] = (), /, **kwargs) -> Future:
+        """Queue ``fn(db, **kwargs)`` for the next batch; the future resolves after its commit."""
+        self._ensure_started()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((fn, tuple(tags), kwargs, future))
+        except queue.Full:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Write queue is full")
+        return future
+
+    @property
+    def pending(self) -> int:
+        """Writes queued and not yet picked up by a batch."""
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Finish queued writes and stop the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self._commit(batch)
+            except Exception:
+                logger.exception("Group commit failed")
+            if stopping:
+                return
+
+    def _commit(self, batch: list) -> None:
+        outcomes: list[tuple[Future, bool, Any]] = []
+        tags: set[str] = set()
+        db: Optional[Session] = None
+        try:
+            db = self.session_factory()
+            for fn, fn_tags, kwargs, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                savepoint = db.begin_nested()
+                try:
+                    result = fn(db, **kwargs)
+                    savepoint.commit()
+                except Exception as exc:
+                    savepoint.rollback()
+                    outcomes.append((future, False, exc))
+                    continue
+                outcomes.append((future, True, result))
+                tags.update(fn_tags)
+            db.commit()
+        except Exception as exc:
+            # Nothing in this batch was committed; that includes items not reached yet
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            if db is not None:
+                db.rollback()
+            raise
+        finally:
+            if db is not None:
+                db.close()
+        self.batches += 1
+        self.writes += len(outcomes)
+        if tags:
+            response_cache.invalidate(*tags)
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+
+def _build_writer() -> Optional[GroupCommitWriter]:
+    if not GROUP_COMMIT:
+        return None
+    if DB_PROFILE == "legacy":
+        logger.warning("CT_GROUP_COMMIT requires the production storage profile; using per-request commits")
+        return None
+    return GroupCommitWriter()
+
+
+group_writer = _build_writer()
+
+
+def write_timeout() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Write timed out")
+
+
+def run_write(db: Session, fn: Callable, tags: Iterable[str] = (), /, **kwargs) -> Any:
+    """Run ``fn(db, **kwargs)`` and commit it, through the group writer when enabled.
+
+    ``fn`` adds and flushes but never commits. Under group commit it runs in its own
+    savepoint, and a 503 from a timed-out wait means the write was not applied.
+    """
+    if group_writer is not None:
+        # Hand back the writer connection (e.g. taken by an existence check) so the
+        # writer thread is not left waiting on it
+        db.commit()
+        future = group_writer.submit(fn, tags, **kwargs)
+        try:
+            return future.result(timeout=WAIT_TIMEOUT)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise write_timeout()
+            # Its batch already started: the write may commit, so report the real outcome
+            return future.result()
+    result = fn(db, **kwargs)
+    db.commit()
+    if tags:
+        response_cache.invalidate(*tags)
+    return result
+
+
+def shutdown() -> None:
+    if group_writer is not None:
+        group_writer.stop()
@@ -0,0 +1,126 @@
+"""Compare per-request commits with the group-commit writer for reaction toggles.
+
+Usage (from backend/):
+    python -m benchmarks.bench_group_commit --threads 32 --seconds 10
+
+Each mode runs in a fresh process on a fresh database (production storage
+profile). Client threads stand in for request handlers and toggle place
+reactions through the same write function the route uses:
+``per-request`` opens a writer session and commits each toggle on its own,
+``group`` submits it to a GroupCommitWriter and waits for its batch.
+Prints one JSON object per mode with throughput and latency percentiles.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import tempfile
+import threading
+import time
+
+
+def _run(mode: str, path: str, args, out) -> None:
+    os.environ["CT_DB_PATH"] = path
+    os.environ["CT_DB_PROFILE"] = "production"
+    os.environ["CT_UPLOAD_DIR"] = os.path.join(os.path.dirname(path), "uploads")
+    os.environ["CT_GROUP_COMMIT"] = "0"
+    os.environ["CT_DB_SYNCHRONOUS"] = args.synchronous
+    from app.main import app  # noqa: F401  (creates schema, triggers and seed data)
+    from app import models, schemas
+    from app.database import SessionLocal
+    from app.routers.places import write_place_reaction
+    from app.writer import GroupCommitWriter
+
+    db = SessionLocal()
+    db.add_all(models.Place(name=f"Place {i}", description="Benchmark place", latitude=-33.9, longitude=18.4) for i in range(args.places))
+    db.commit()
+    place_ids = [pid for (pid,) in db.query(models.Place.id)]
+    db.close()
+
+    writer = GroupCommitWriter(window=args.window_ms / 1000, max_batch=args.max_batch) if mode == "group" else None
+    deadline = time.perf_counter() + args.seconds
+    lock = threading.Lock()
+    latencies: list[float] = []
+    errors = [0]
+
+    def client(n: int) -> None:
+        local, i = [], 0
+        while time.perf_counter() < deadline:
+            payload = schemas.ReactionIn(value=1, client_id=f"bench-{n}-{i % 50}")
+            place_id = place_ids[(n * 7 + i) % len(place_ids)]
+            i += 1
+            t0 = time.perf_counter()
+            try:
+                if writer is not None:
+                    writer.submit(write_place_reaction, place_id=place_id, payload=payload, current_user=None).result()
+                else:
+                    session = SessionLocal()
+                    try:
+                        write_place_reaction(session, place_id=place_id, payload=payload, current_user=None)
+                        session.commit()
+                    finally:
+                        session.close()
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    result = {"mode": mode, "writes": len(latencies), "errors": errors[0], "latencies": latencies}
+    if writer is not None:
+        writer.stop()
+        result["batches"] = writer.batches
+    out.put(result)
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 3)
+
+
+def run_mode(mode: str, args) -> dict:
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        out = ctx.Queue()
+        proc = ctx.Process(target=_run, args=(mode, os.path.join(tmp, "bench.db"), args, out))
+        proc.start()
+        res = out.get()
+        proc.join()
+    lat = res.pop("latencies")
+    summary = {
+        "mode": mode,
+        "writes_per_s": round(res["writes"] / args.seconds, 1),
+        "p50_ms": _pct(lat, 0.50),
+        "p99_ms": _pct(lat, 0.99),
+        "errors": res["errors"],
+    }
+    if "batches" in res:
+        summary["avg_batch"] = round(res["writes"] / max(1, res["batches"]), 1)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="per-request,group")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--places", type=int, default=200)
+    parser.add_argument("--synchronous", default="NORMAL", help="SQLite synchronous pragma (NORMAL or FULL)")
+    parser.add_argument("--window-ms", type=float, default=0.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+    for mode in args.modes.split(","):
+        print(json.dumps(run_mode(mode.strip(), args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare the schema and row-tuple serialization paths of the list endpoints.
+
+Usage (from backend/):
+    python -m benchmarks.bench_json
+    python -m benchmarks.bench_json --scale medium --sizes 50,200,1000,5000 --repeat 30
+
+For each list size, the places and gallery lists are built both ways from
+a seeded database (see ``benchmarks.seed``). The ``schema`` path loads ORM
+objects and dumps them through ``TypeAdapter(List[Out])`` with
+``from_attributes``, as the routes do with ``CT_FAST_JSON=off``. The
+``rows`` path selects the schema's columns as tuples and calls
+``fastjson.encode_rows``. Both time the query, hydration and encoding,
+which is the work a cache miss pays. The bodies are compared byte for
+byte before timing. Prints one JSON object per list and size with median
+milliseconds per call and the speed-up.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+
+def _time(fn, repeat: int) -> float:
+    fn()  # warm up statement caches
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    from benchmarks.seed import add_dataset_args, dataset_from_args, ensure
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_args(parser)
+    parser.add_argument("--sizes", default="50,200,1000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    path = ensure(dataset_from_args(args), args.data_dir, args.rebuild, log=lambda msg: print(msg, file=sys.stderr))
+    # The engines read CT_DB_PATH on first import; seeding must not have imported them already
+    if "app.database" in sys.modules:
+        sys.exit("app.database was imported before CT_DB_PATH was set")
+    os.environ["CT_DB_PATH"] = path
+    os.environ["CT_METRICS"] = "off"
+    from app import fastjson, models
+    from app.database import ReadSessionLocal
+    from app.routers import gallery, places
+
+    lists = [
+        ("places", models.Place, models.Place.id.asc(), places._place_list, places._PLACE_OUT_COLUMNS, None),
+        ("gallery", models.GalleryImage, models.GalleryImage.id.desc(), gallery._gallery_list,
+         gallery._GALLERY_OUT_COLUMNS, gallery._GALLERY_TRANSFORMS),
+    ]
+    db = ReadSessionLocal()
+    try:
+        for name, model, order, adapter, columns, transforms in lists:
+            for size in (int(s) for s in args.sizes.split(",")):
+                def schema_path():
+                    rows = db.query(model).order_by(order).limit(size).all()
+                    body = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+                    # Like a request: the session does not keep the objects around
+                    db.expunge_all()
+                    return body
+
+                def rows_path():
+                    return fastjson.encode_rows(columns, db.query(*columns).order_by(order).limit(size).all(), transforms)
+
+                if schema_path() != rows_path():
+                    sys.exit(f"{name} x{size}: the two paths produced different JSON")
+                schema_ms, rows_ms = _time(schema_path, args.repeat), _time(rows_path, args.repeat)
+                print(json.dumps({
+                    "list": name,
+                    "rows": size,
+                    "schema_ms": round(schema_ms, 3),
+                    "rows_ms": round(rows_ms, 3),
+                    "speedup": round(schema_ms / rows_ms, 2),
+                    "encoder": "orjson" if fastjson.orjson is not None else "json",
+                }))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Read latency during a login storm, with Argon2 inline vs in the hashing pool.
+
+Usage (from backend/):
+    python -m benchmarks.bench_login_storm --logins 16 --readers 4 --seconds 10
+
+For each mode a uvicorn server is started on a fresh database: ``inline``
+sets CT_HASH_WORKERS=0 (hash in the request thread, the old behaviour),
+``pool`` uses the hashing process pool with its default queue limit.
+Reader threads list places the whole time; after a quiet baseline window,
+login threads post valid credentials as fast as they can. Prints one JSON
+object per mode with read p50/p99 before and during the storm, and login
+throughput and status counts.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+MODES = {"inline": {"CT_HASH_WORKERS": "0"}, "pool": {}}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _request(url: str, body: bytes | None = None) -> int:
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"} if body else {})
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+
+
+def _start_server(tmp: str, mode: str, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "CT_DB_PATH": os.path.join(tmp, "bench.db"),
+        "CT_UPLOAD_DIR": os.path.join(tmp, "uploads"),
+        # Measure the routes, not the response cache
+        "CT_RESPONSE_CACHE": "off",
+        **MODES[mode],
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if _request(f"http://127.0.0.1:{port}/api/places/") == 200:
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("server did not start")
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 3)
+
+
+def run_mode(mode: str, args) -> dict:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        server = _start_server(tmp, mode, port)
+        try:
+            start = time.perf_counter()
+            storm_at = start + args.baseline
+            stop_at = storm_at + args.seconds
+            reads: list[tuple[float, float]] = []
+            logins: list[int] = []
+            lock = threading.Lock()
+
+            def read_loop():
+                local = []
+                while (now := time.perf_counter()) < stop_at:
+                    _request(f"{base}/api/places/")
+                    local.append((now, time.perf_counter() - now))
+                with lock:
+                    reads.extend(local)
+
+            def login_loop():
+                body = json.dumps({"username": "admin", "password": "pioner18"}).encode()
+                while time.perf_counter() < storm_at:
+                    time.sleep(0.01)
+                local = []
+                while time.perf_counter() < stop_at:
+                    local.append(_request(f"{base}/api/auth/login", body))
+                with lock:
+                    logins.extend(local)
+
+            threads = [threading.Thread(target=read_loop) for _ in range(args.readers)]
+            threads += [threading.Thread(target=login_loop) for _ in range(args.logins)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            server.terminate()
+            server.wait()
+    before = [lat for at, lat in reads if at < storm_at]
+    during = [lat for at, lat in reads if at >= storm_at]
+    return {
+        "mode": mode,
+        "read_p50_ms_before": _pct(before, 0.50),
+        "read_p99_ms_before": _pct(before, 0.99),
+        "read_p50_ms_during": _pct(during, 0.50),
+        "read_p99_ms_during": _pct(during, 0.99),
+        "reads_per_s_during": round(len(during) / args.seconds, 1),
+        "logins_ok_per_s": round(logins.count(200) / args.seconds, 1),
+        "logins_503": logins.count(503),
+        "logins_other": len(logins) - logins.count(200) - logins.count(503),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="inline,pool")
+    parser.add_argument("--readers", type=int, default=4, help="threads listing places")
+    parser.add_argument("--logins", type=int, default=16, help="threads posting logins during the storm")
+    parser.add_argument("--baseline", type=float, default=3.0, help="seconds of reads before the storm")
+    parser.add_argument("--seconds", type=float, default=10.0, help="storm duration")
+    args = parser.parse_args()
+    for mode in args.modes.split(","):
+        print(json.dumps(run_mode(mode.strip(), args)))
+
+
+if __name__ == "__main__":
+    main()
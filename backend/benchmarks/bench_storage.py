@@ -0,0 +1,167 @@
+"""Compare SQLite storage profiles under concurrent reaction writes and list reads.
+
+Usage (from backend/):
+    python -m benchmarks.bench_storage --processes 2 --writers 2 --readers 4 --seconds 10
+
+Each profile gets a fresh database in a temp directory. Worker processes
+stand in for uvicorn workers; inside each, writer threads toggle place
+reactions and reader threads list places, the same work the routes do,
+pausing --think-ms between operations.
+Prints one JSON object per profile with throughput, p50/p99 latency and the
+number of "database is locked" errors.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import tempfile
+import threading
+import time
+
+
+def _use_db(path: str, profile: str) -> None:
+    os.environ["CT_DB_PATH"] = path
+    os.environ["CT_DB_PROFILE"] = profile
+    os.environ.setdefault("CT_UPLOAD_DIR", os.path.join(os.path.dirname(path), "uploads"))
+
+
+def _prepare(path: str, profile: str, places: int) -> None:
+    _use_db(path, profile)
+    from app.main import app  # noqa: F401  (creates schema, triggers and seed data)
+    from app.database import SessionLocal
+    from app import models
+
+    db = SessionLocal()
+    try:
+        db.add_all(
+            models.Place(name=f"Place {i}", description="Benchmark place", latitude=-33.9, longitude=18.4)
+            for i in range(places)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _worker(path: str, profile: str, writers: int, readers: int, seconds: float, places: int, think: float, proc: int, out):
+    _use_db(path, profile)
+    from app.database import ReadSessionLocal, SessionLocal
+    from app.reactions import apply_place_reaction
+    from app import models
+
+    deadline = time.perf_counter() + seconds
+    lock = threading.Lock()
+    stats = {"write": [], "read": [], "locked": 0, "errors": 0}
+
+    def write_loop(n: int):
+        rnd = random.Random(proc * 1000 + n)
+        lat, locked, errors = [], 0, 0
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            db = SessionLocal()
+            try:
+                apply_place_reaction(db, rnd.randint(1, places), rnd.choice((1, -1)), client_id=f"bench-{proc}-{n}-{rnd.randint(1, 50)}")
+                db.commit()
+                lat.append(time.perf_counter() - t0)
+            except Exception as exc:
+                db.rollback()
+                if "locked" in str(exc):
+                    locked += 1
+                else:
+                    errors += 1
+            finally:
+                db.close()
+            time.sleep(think)
+        with lock:
+            stats["write"].extend(lat)
+            stats["locked"] += locked
+            stats["errors"] += errors
+
+    def read_loop(n: int):
+        lat, locked, errors = [], 0, 0
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            db = ReadSessionLocal()
+            try:
+                db.query(models.Place).order_by(models.Place.id).limit(50).all()
+                lat.append(time.perf_counter() - t0)
+            except Exception as exc:
+                if "locked" in str(exc):
+                    locked += 1
+                else:
+                    errors += 1
+            finally:
+                db.close()
+            time.sleep(think)
+        with lock:
+            stats["read"].extend(lat)
+            stats["locked"] += locked
+            stats["errors"] += errors
+
+    threads = [threading.Thread(target=write_loop, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=read_loop, args=(i,)) for i in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    out.put(stats)
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 3)
+
+
+def run_profile(profile: str, args) -> dict:
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        prep = ctx.Process(target=_prepare, args=(path, profile, args.places))
+        prep.start()
+        prep.join()
+        out = ctx.Queue()
+        procs = [
+            ctx.Process(
+                target=_worker,
+                args=(path, profile, args.writers, args.readers, args.seconds, args.places, args.think_ms / 1000, i, out),
+            )
+            for i in range(args.processes)
+        ]
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+    writes = [v for r in results for v in r["write"]]
+    reads = [v for r in results for v in r["read"]]
+    return {
+        "profile": profile,
+        "writes_per_s": round(len(writes) / args.seconds, 1),
+        "reads_per_s": round(len(reads) / args.seconds, 1),
+        "write_p50_ms": _pct(writes, 0.50),
+        "write_p99_ms": _pct(writes, 0.99),
+        "read_p50_ms": _pct(reads, 0.50),
+        "read_p99_ms": _pct(reads, 0.99),
+        "locked_errors": sum(r["locked"] for r in results),
+        "other_errors": sum(r["errors"] for r in results),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", default="legacy,production")
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--writers", type=int, default=2, help="writer threads per process")
+    parser.add_argument("--readers", type=int, default=4, help="reader threads per process")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--places", type=int, default=500)
+    parser.add_argument("--think-ms", type=float, default=5.0, help="pause after each operation, standing in for request I/O")
+    args = parser.parse_args()
+    for profile in args.profiles.split(","):
+        print(json.dumps(run_profile(profile.strip(), args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Fail when an endpoint runs more SQL statements than its budget.
+
+Usage (from backend/):
+    python -m benchmarks.check_query_budget
+    CT_DB_ASYNC=1 python -m benchmarks.check_query_budget
+
+Seeds a fresh database with enough places, comments, reactions and images
+that an N+1 pattern would show up as dozens of queries. It then requests
+each endpoint once through a TestClient inside ``assert_max_queries`` and
+prints one line per endpoint with its count and budget. The exit status
+is 1 if any endpoint is over budget, so the script can gate CI. The
+response cache is off, so the route's own queries are what get counted.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+# (method, path, budget, request kwargs); "auth": True sends the admin token
+BUDGETS = [
+    ("GET", "/api/places/", 2, {}),
+    ("GET", "/api/places/?limit=10", 2, {}),
+    ("GET", "/api/places/1", 3, {}),
+    ("GET", "/api/places/1/page?client_id=budget", 3, {}),
+    # The first authenticated request also loads the user into the auth cache
+    ("GET", "/api/places/1/page", 4, {"auth": True}),
+    ("GET", "/api/places/reactions?ids=1,2,3,4,5,6,7,8,9,10&client_id=budget", 2, {}),
+    ("GET", "/api/places/1/reactions?client_id=budget", 2, {}),
+    ("GET", "/api/places/nearby?lat=-33.9&lon=18.4&radius_km=50", 3, {}),
+    ("GET", "/api/places/clusters?bbox=17,-35,20,-32&zoom=12", 3, {}),
+    ("GET", "/api/comments/place/1?limit=20", 3, {}),
+    ("GET", "/api/gallery/", 2, {}),
+    ("GET", "/api/gallery/reactions?ids=1,2,3&client_id=budget", 2, {}),
+    ("GET", "/api/search?q=place", 2, {}),
+    ("GET", "/api/auth/me", 1, {"auth": True}),
+    ("PUT", "/api/places/1/react", 6, {"json": {"value": 1, "client_id": "budget"}}),
+    ("POST", "/api/comments/place/1", 2, {"json": {"author": "budget", "content": "Query budget"}}),
+    ("POST", "/api/contacts/", 1, {"json": {"name": "Budget", "email": "budget@example.com", "message": "Hi"}}),
+]
+
+
+def _seed(places: int, per_place: int) -> None:
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        rows = [
+            models.Place(name=f"Place {i}", description="Budget place", latitude=-33.9 + i / 1000, longitude=18.4)
+            for i in range(places)
+        ]
+        db.add_all(rows)
+        db.flush()
+        for place in rows:
+            db.add_all(models.Comment(place_id=place.id, author="seed", content=f"Comment {j}") for j in range(per_place))
+            db.add_all(models.PlaceReaction(place_id=place.id, client_id=f"seed-{j}", value=1) for j in range(per_place))
+        db.add_all(models.GalleryImage(title=f"Image {i}", image_url=f"https://example.com/{i}.jpg") for i in range(places))
+        db.commit()
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--places", type=int, default=30)
+    parser.add_argument("--per-place", type=int, default=10, help="comments and reactions per place")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["CT_DB_PATH"] = os.path.join(tmp, "budget.db")
+    os.environ["CT_UPLOAD_DIR"] = os.path.join(tmp, "uploads")
+    os.environ["CT_RESPONSE_CACHE"] = "off"
+    os.environ["CT_RATE_LIMIT"] = "off"
+    os.environ["CT_HASH_WORKERS"] = "0"
+
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.profiler import assert_max_queries
+
+    _seed(args.places, args.per_place)
+    failed = 0
+    with TestClient(app) as client:
+        token = client.post("/api/auth/login", json={"username": "admin", "password": "pioner18"}).json()["access_token"]
+        auth = {"Authorization": f"Bearer {token}"}
+        for method, path, budget, kwargs in BUDGETS:
+            kwargs = dict(kwargs)
+            if kwargs.pop("auth", False):
+                kwargs["headers"] = auth
+            try:
+                with assert_max_queries(budget) as log:
+                    response = client.request(method, path, **kwargs)
+            except AssertionError as exc:
+                failed += 1
+                print(f"FAIL {method} {path}: {exc}")
+                continue
+            if response.status_code >= 400:
+                failed += 1
+                print(f"FAIL {method} {path}: HTTP {response.status_code}")
+                continue
+            print(f"ok   {method} {path}: {log.count}/{budget}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""Mixed read/write load test against a large seeded database.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --scale full --seconds 60 --concurrency 64
+    CT_DB_ASYNC=1 python -m benchmarks.load_test --mix read-heavy
+    python -m benchmarks.load_test --mix "place_page=5,react=5,comment=1" --out results.json
+
+The dataset comes from ``benchmarks.seed`` (built on first use, then reused)
+and is copied to a scratch directory for every run, so writes never leak
+into the next run. The app is driven in-process through httpx's ASGI
+transport: no sockets or server are involved, and what gets measured is the
+application, the database and their interaction. ``--concurrency`` client
+tasks each pick a weighted random scenario, send the request and record its
+latency until ``--seconds`` have elapsed. The first ``--warmup`` seconds are
+run but not recorded.
+
+Every request choice comes from ``--seed``. Given the same dataset, mix and
+concurrency, two runs send the same kind of traffic, so results from
+different commits can be compared. Set the app's own ``CT_*`` variables
+(``CT_DB_ASYNC``, ``CT_GROUP_COMMIT``, ``CT_RESPONSE_CACHE``, ...) in the
+environment as usual; they are echoed in the report. The rate limiter is
+turned off unless ``CT_RATE_LIMIT`` is set explicitly.
+
+The report is one JSON object with the run's parameters and, in total and
+per scenario, the successful request count and requests/s, the error count,
+p50/p95/p99/max latency in milliseconds over successful requests, and a
+count per status code. Load shedding (503 from the login hashing queue)
+shows up as errors.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import asdict
+
+from benchmarks.seed import LAT_RANGE, LON_RANGE, USER_PASSWORD, WORDS, add_dataset_args, dataset_from_args, ensure
+
+# Scenario name -> weight
+MIXES = {
+    "read-heavy": {
+        "places_list": 10, "places_bbox": 15, "place_page": 25, "place_detail": 5, "comments_page": 10,
+        "nearby": 5, "gallery_list": 8, "place_reactions": 8, "gallery_reactions": 4, "search": 5,
+        "react": 3, "gallery_react": 1, "comment": 1,
+    },
+    "write-heavy": {
+        "place_page": 15, "places_bbox": 5, "comments_page": 5, "place_reactions": 5,
+        "react": 35, "gallery_react": 15, "comment": 20,
+    },
+    "login": {"login": 20, "me": 30, "place_page": 30, "react": 20},
+}
+MIXES["mixed"] = {name: 1 for name in sorted({s for mix in MIXES.values() for s in mix})}
+ENV_ECHO = (
+    "CT_DB_ASYNC", "CT_DB_PROFILE", "CT_DB_SYNCHRONOUS", "CT_GROUP_COMMIT", "CT_RESPONSE_CACHE",
+    "CT_RATE_LIMIT", "CT_HASH_WORKERS", "CT_METRICS", "CT_QUERY_PROFILER",
+)
+
+
+class Scenarios:
+    """Builds one request per scenario from a client's own random stream."""
+
+    def __init__(self, sizes: dict, place_ids: tuple[int, int], image_ids: tuple[int, int]):
+        self.sizes = sizes
+        self.place_lo, self.place_hi = place_ids
+        self.image_lo, self.image_hi = image_ids
+
+    def place(self, rng: random.Random) -> int:
+        # Same skew as the seeded comments: popular places get most traffic
+        return self.place_lo + int((self.place_hi - self.place_lo) * rng.random() ** 3)
+
+    def image(self, rng: random.Random) -> int:
+        return rng.randint(self.image_lo, self.image_hi)
+
+    def user(self, rng: random.Random) -> str:
+        return f"bench{rng.randrange(self.sizes['users'])}"
+
+    def build(self, name: str, rng: random.Random, client_id: str, token: str | None):
+        """``(method, url, kwargs)`` for scenario ``name``."""
+        if name == "places_list":
+            return "GET", "/api/places/", {"params": {"limit": 50}}
+        if name == "places_bbox":
+            # A city-block to neighbourhood sized viewport
+            span = rng.uniform(0.01, 0.08)
+            lon = rng.uniform(LON_RANGE[0], LON_RANGE[1] - span)
+            lat = rng.uniform(LAT_RANGE[0], LAT_RANGE[1] - span)
+            return "GET", "/api/places/", {"params": {"bbox": f"{lon},{lat},{lon + span},{lat + span}", "limit": 200}}
+        if name == "place_page":
+            return "GET", f"/api/places/{self.place(rng)}/page", {"params": {"client_id": client_id}}
+        if name == "place_detail":
+            return "GET", f"/api/places/{self.place(rng)}", {}
+        if name == "comments_page":
+            return "GET", f"/api/comments/place/{self.place(rng)}", {"params": {"limit": 20}}
+        if name == "nearby":
+            return "GET", "/api/places/nearby", {"params": {
+                "lat": rng.uniform(*LAT_RANGE), "lon": rng.uniform(*LON_RANGE), "radius_km": rng.choice((1, 2, 5)),
+            }}
+        if name == "gallery_list":
+            return "GET", "/api/gallery/", {"params": {"limit": 24}}
+        if name == "place_reactions":
+            ids = ",".join(str(self.place(rng)) for _ in range(20))
+            return "GET", "/api/places/reactions", {"params": {"ids": ids, "client_id": client_id}}
+        if name == "gallery_reactions":
+            ids = ",".join(str(self.image(rng)) for _ in range(24))
+            return "GET", "/api/gallery/reactions", {"params": {"ids": ids, "client_id": client_id}}
+        if name == "search":
+            return "GET", "/api/search/", {"params": {"q": rng.choice(WORDS)}}
+        if name == "react":
+            return "PUT", f"/api/places/{self.place(rng)}/react", {
+                "json": {"value": 1 if rng.random() < 0.8 else -1, "client_id": client_id}}
+        if name == "gallery_react":
+            return "PUT", f"/api/gallery/{self.image(rng)}/react", {
+                "json": {"value": 1 if rng.random() < 0.8 else -1, "client_id": client_id}}
+        if name == "comment":
+            words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 30)))
+            return "POST", f"/api/comments/place/{self.place(rng)}", {"json": {"author": client_id, "content": words}}
+        if name == "login":
+            return "POST", "/api/auth/login", {"json": {"username": self.user(rng), "password": USER_PASSWORD}}
+        if name == "me":
+            return "GET", "/api/auth/me", {"headers": {"Authorization": f"Bearer {token}"}}
+        raise ValueError(f"unknown scenario: {name}")
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    if spec in MIXES:
+        return dict(MIXES[spec])
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 3)
+
+
+def _summary(latencies: list[float], errors: int, seconds: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / seconds, 1),
+        "p50_ms": _pct(latencies, 0.50),
+        "p95_ms": _pct(latencies, 0.95),
+        "p99_ms": _pct(latencies, 0.99),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args, sizes: dict, mix: dict[str, float]) -> dict:
+    import httpx
+
+    from app.database import SessionLocal
+    from app.main import app
+    from app import models
+    from sqlalchemy import func, select
+
+    db = SessionLocal()
+    try:
+        place_ids = db.execute(select(func.min(models.Place.id), func.max(models.Place.id))).one()
+        image_ids = db.execute(select(func.min(models.GalleryImage.id), func.max(models.GalleryImage.id))).one()
+    finally:
+        db.close()
+    scenarios = Scenarios(sizes, tuple(place_ids), tuple(image_ids))
+    names, weights = zip(*mix.items())
+    for name in names:
+        # Fail on typos before the clock starts
+        scenarios.build(name, random.Random(0), "check", "token")
+
+    # (scenario, status or "exception", seconds), recorded after the warmup only
+    samples: list[tuple[str, int | str, float]] = []
+    record_from = time.perf_counter() + args.warmup
+    deadline = record_from + args.seconds
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        token = None
+        if "me" in names:
+            r = await client.post("/api/auth/login", json={"username": "bench0", "password": USER_PASSWORD})
+            r.raise_for_status()
+            token = r.json()["access_token"]
+
+        async def worker(n: int) -> None:
+            rng = random.Random(f"{args.seed}-{n}")
+            client_id = f"load-{n}"
+            while True:
+                name = rng.choices(names, weights)[0]
+                method, url, kwargs = scenarios.build(name, rng, client_id, token)
+                t0 = time.perf_counter()
+                if t0 >= deadline:
+                    return
+                try:
+                    status = (await client.request(method, url, **kwargs)).status_code
+                except Exception:
+                    status = "exception"
+                if t0 >= record_from:
+                    samples.append((name, status, time.perf_counter() - t0))
+
+        await asyncio.gather(*(worker(n) for n in range(args.concurrency)))
+    # ASGITransport sends no lifespan events: stop the worker pools and connections ourselves
+    await app.router.shutdown()
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    statuses: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for name, status, seconds in samples:
+        statuses[name][str(status)] += 1
+        if status == "exception" or status >= 400:
+            errors[name] += 1
+        else:
+            latencies[name].append(seconds)
+    scenarios_out = {}
+    for name in names:
+        scenarios_out[name] = {**_summary(latencies[name], errors[name], args.seconds),
+                               "statuses": dict(sorted(statuses[name].items()))}
+    return {
+        "total": _summary([s for v in latencies.values() for s in v], sum(errors.values()), args.seconds),
+        "scenarios": scenarios_out,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_args(parser)
+    parser.add_argument("--mix", default="read-heavy",
+                        help=f"one of {', '.join(sorted(MIXES))}, or name=weight,... (default read-heavy)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    ds = dataset_from_args(args)
+    mix = parse_mix(args.mix)
+    source = ensure(ds, args.data_dir, args.rebuild, log=lambda msg: print(msg, file=sys.stderr))
+
+    scratch = tempfile.mkdtemp(prefix="ct-load-")
+    try:
+        path = os.path.join(scratch, "load.db")
+        shutil.copyfile(source, path)
+        os.environ["CT_DB_PATH"] = path
+        os.environ["CT_UPLOAD_DIR"] = os.path.join(scratch, "uploads")
+        os.environ.setdefault("CT_RATE_LIMIT", "off")
+        results = asyncio.run(run(args, asdict(ds), mix))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        "commit": _git_commit(),
+        "dataset": asdict(ds),
+        "mix": mix,
+        "concurrency": args.concurrency,
+        "seconds": args.seconds,
+        "warmup": args.warmup,
+        "env": {k: os.environ[k] for k in ENV_ECHO if k in os.environ},
+        **results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
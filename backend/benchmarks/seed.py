@@ -0,0 +1,231 @@
+"""Build large, reproducible benchmark databases.
+
+Usage (from backend/):
+    python -m benchmarks.seed --scale full
+    python -m benchmarks.seed --places 20000 --comments 200000 --reactions 1000000
+
+The app creates the schema, migrations, triggers and its seed rows. Bulk
+rows are then inserted with executemany in large transactions on a plain
+sqlite3 connection. The triggers stay active, so the search index, the
+spatial index and the collection versions end up exactly as they would in
+production. The like/dislike counters are recomputed at the end. Every
+value comes from a fixed random seed, so a dataset is identical across
+runs and commits.
+
+Datasets are cached in --data-dir under a name derived from their
+parameters and reused when they already exist. Pass --rebuild to start
+over. Seeded users are ``bench0`` ... ``benchN`` with the password
+``bench-password``. They share one Argon2 hash, so seeding does not spend
+minutes hashing.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+
+
+SCALES = {
+    "small": dict(places=2_000, comments=20_000, reactions=100_000, gallery=1_000, users=50),
+    "medium": dict(places=20_000, comments=200_000, reactions=1_000_000, gallery=10_000, users=200),
+    "full": dict(places=100_000, comments=1_000_000, reactions=5_000_000, gallery=50_000, users=1_000),
+}
+USER_PASSWORD = "bench-password"
+BATCH = 50_000
+# Cape Town area, where the map is centred
+LAT_RANGE = (-34.40, -33.60)
+LON_RANGE = (18.30, 18.90)
+WORDS = (
+    "beach mountain view trail harbour market museum garden sunset vineyard cafe lighthouse cliff bay "
+    "historic colourful quiet busy scenic family hike swim penguins wine food craft art coast"
+).split()
+
+
+@dataclass(frozen=True)
+class Dataset:
+    places: int
+    comments: int
+    reactions: int
+    gallery: int
+    users: int
+    seed: int = 42
+
+    @property
+    def name(self) -> str:
+        return f"ct-{self.places}p-{self.comments}c-{self.reactions}r-{self.gallery}g-{self.users}u-s{self.seed}.db"
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _batches(rows, size: int = BATCH):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+_SCHEMA_SCRIPT = """
+import json, sys
+import app.main
+from app.hashing import pwd_context
+from app.reactions import recount_statements
+print(json.dumps({"user_hash": pwd_context.hash(sys.argv[1]), "recount": list(recount_statements())}))
+"""
+
+
+def _create_schema(path: str) -> dict:
+    """Build the app schema in ``path``; returns the users' password hash and the counter recount SQL.
+
+    Everything that needs ``app`` runs in a fresh interpreter. Importing it
+    here would build the engines from the caller's CT_DB_PATH, and a load
+    test that seeds on first use would then drive (and write to) that
+    database instead of its scratch copy.
+    """
+    env = {**os.environ, "CT_DB_PATH": path, "CT_UPLOAD_DIR": os.path.join(os.path.dirname(path), "uploads"),
+           "CT_HASH_WORKERS": "0"}
+    out = subprocess.run([sys.executable, "-c", _SCHEMA_SCRIPT, USER_PASSWORD], env=env, check=True,
+                         stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def build(path: str, ds: Dataset, log=print) -> None:
+    rng = random.Random(ds.seed)
+    app_info = _create_schema(path)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA journal_mode=WAL")
+    start = time.perf_counter()
+
+    def insert(sql: str, rows, label: str, total: int) -> None:
+        done = 0
+        for batch in _batches(rows):
+            with conn:
+                conn.executemany(sql, batch)
+            done += len(batch)
+            log(f"  {label}: {done}/{total} ({time.perf_counter() - start:.0f}s)")
+
+    hashed = app_info["user_hash"]
+    insert(
+        "INSERT INTO users (username, email, hashed_password, role) VALUES (?, ?, ?, 'user')",
+        ((f"bench{i}", f"bench{i}@example.com", hashed) for i in range(ds.users)),
+        "users", ds.users,
+    )
+    first_user = conn.execute("SELECT min(id) FROM users WHERE username LIKE 'bench%'").fetchone()[0]
+
+    def places():
+        for i in range(ds.places):
+            yield (
+                f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}",
+                _text(rng, rng.randint(8, 40)),
+                round(rng.uniform(*LAT_RANGE), 6),
+                round(rng.uniform(*LON_RANGE), 6),
+                f"https://picsum.photos/seed/{i}/1200/800",
+                f"bench-{i}",
+            )
+
+    insert(
+        "INSERT INTO places (name, description, latitude, longitude, image_url, external_id) VALUES (?, ?, ?, ?, ?, ?)",
+        places(), "places", ds.places,
+    )
+    place_lo, place_hi = conn.execute("SELECT min(id), max(id) FROM places").fetchone()
+
+    def comments():
+        for _ in range(ds.comments):
+            # Skewed: a few popular places collect most comments
+            place = place_lo + int((place_hi - place_lo) * rng.random() ** 3)
+            yield (place, f"visitor{rng.randint(1, 5000)}", _text(rng, rng.randint(5, 60)),
+                   f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00")
+
+    insert(
+        "INSERT INTO comments (place_id, author, content, created_at) VALUES (?, ?, ?, ?)",
+        comments(), "comments", ds.comments,
+    )
+
+    def reactions(target_lo: int, target_hi: int, total: int):
+        # client ids are unique per target: the n-th reaction on every target comes from client n
+        span = target_hi - target_lo + 1
+        for n in range(total):
+            yield (target_lo + n % span, f"bench-client-{n // span}", 1 if rng.random() < 0.8 else -1)
+
+    insert(
+        "INSERT INTO place_reactions (place_id, client_id, value) VALUES (?, ?, ?)",
+        reactions(place_lo, place_hi, ds.reactions), "place reactions", ds.reactions,
+    )
+    insert(
+        "INSERT INTO gallery_images (title, image_url, created_by) VALUES (?, ?, ?)",
+        ((_text(rng, 3).title(), f"https://picsum.photos/seed/g{i}/1600/1067", first_user) for i in range(ds.gallery)),
+        "gallery", ds.gallery,
+    )
+    if ds.gallery:
+        image_lo, image_hi = conn.execute("SELECT min(id), max(id) FROM gallery_images").fetchone()
+        gallery_reactions = ds.reactions // 10
+        insert(
+            "INSERT INTO gallery_reactions (image_id, client_id, value) VALUES (?, ?, ?)",
+            reactions(image_lo, image_hi, gallery_reactions), "gallery reactions", gallery_reactions,
+        )
+
+    with conn:
+        for stmt in app_info["recount"]:
+            conn.execute(stmt)
+    conn.execute("PRAGMA optimize")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    log(f"  done in {time.perf_counter() - start:.0f}s")
+
+
+def ensure(ds: Dataset, data_dir: str, rebuild: bool = False, log=print) -> str:
+    """Path of a database holding ``ds``, building it first if needed."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, ds.name)
+    if rebuild or not os.path.exists(path):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        log(f"seeding {path}")
+        tmp = path + ".partial"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        build(tmp, ds, log)
+        os.replace(tmp, path)
+    return path
+
+
+def add_dataset_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for name in ("places", "comments", "reactions", "gallery", "users"):
+        parser.add_argument(f"--{name}", type=int, help=f"override the scale's {name} count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "ct-bench"))
+    parser.add_argument("--rebuild", action="store_true", help="re-seed even if the dataset exists")
+
+
+def dataset_from_args(args) -> Dataset:
+    sizes = dict(SCALES[args.scale])
+    for name in sizes:
+        if getattr(args, name) is not None:
+            sizes[name] = getattr(args, name)
+    return Dataset(seed=args.seed, **sizes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_args(parser)
+    args = parser.parse_args()
+    ds = dataset_from_args(args)
+    path = ensure(ds, args.data_dir, args.rebuild, log=lambda msg: print(msg, file=sys.stderr))
+    print(json.dumps({"path": path, **asdict(ds)}))
+
+
+if __name__ == "__main__":
+    main()
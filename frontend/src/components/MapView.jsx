@@ -1,7 +1,8 @@
-import { MapContainer, TileLayer, Marker, Popup, useMap } from 'react-leaflet'
+import { MapContainer, TileLayer, Marker, Popup, useMap, useMapEvents } from 'react-leaflet'
 import 'leaflet/dist/leaflet.css'
 import L from 'leaflet'
-import { useEffect } from 'react'
+import { useEffect, useMemo, useRef, useState } from 'react'
+import { api } from '../lib/api'
 import './MapView.css'
 
 // Fix default marker icon paths for Leaflet in bundlers
@@ -38,7 +39,63 @@ function FitToMarkers({ positions }) {
   return null
 }
 
-export default function MapView({ places, onSelect }) {
+function viewportBbox(map) {
+  const b = map.getBounds()
+  const clampLat = (v) => Math.max(-90, Math.min(90, v))
+  if (b.getEast() - b.getWest() >= 360) return [-180, clampLat(b.getSouth()), 180, clampLat(b.getNorth())]
+  // The map can be panned past the antimeridian; the API expects -180..180 (minLon > maxLon when it crosses)
+  const wrap = (v) => ((v + 180) % 360 + 360) % 360 - 180
+  return [wrap(b.getWest()), clampLat(b.getSouth()), wrap(b.getEast()), clampLat(b.getNorth())]
+}
+
+function clusterIcon(count) {
+  const size = count < 10 ? 30 : count < 100 ? 36 : count < 1000 ? 42 : 48
+  return L.divIcon({ html: `<span>${count}</span>`, className: 'map-cluster', iconSize: [size, size] })
+}
+
+// Markers for the current viewport from /api/places/clusters, refetched after every pan or zoom
+function ServerClusters({ places, onSelect }) {
+  const map = useMap()
+  const [data, setData] = useState({ clusters: [], points: [] })
+  const latest = useRef(0)
+  const byId = useMemo(() => new Map(places.map(p => [p.id, p])), [places])
+
+  const load = async () => {
+    const seq = ++latest.current
+    try {
+      const res = await api.getPlaceClusters(viewportBbox(map), Math.round(map.getZoom()))
+      // Drop answers that arrive after a newer viewport was requested
+      if (seq === latest.current) setData(res)
+    } catch (e) {
+      console.error(e)
+    }
+  }
+
+  useMapEvents({ moveend: load })
+  useEffect(() => { load() }, [map, places])
+
+  return (
+    <>
+      {data.clusters.map(c => (
+        <Marker
+          key={`c:${c.latitude}:${c.longitude}`}
+          position={[c.latitude, c.longitude]}
+          icon={clusterIcon(c.count)}
+          eventHandlers={{ click: () => map.setView([c.latitude, c.longitude], Math.min(map.getZoom() + 2, map.getMaxZoom())) }}
+        />
+      ))}
+      {data.points.map(p => (
+        <Marker key={p.id} position={[p.latitude, p.longitude]} eventHandlers={{ click: () => onSelect?.(byId.get(p.id) || p) }}>
+          <Popup>
+            <b>{p.name}</b>
+          </Popup>
+        </Marker>
+      ))}
+    </>
+  )
+}
+
+export default function MapView({ places, onSelect, clustered = false }) {
   return (
     <div className="map-wrap">
       <MapContainer className="map-root" center={[-33.9249, 18.4241]} zoom={12} scrollWheelZoom={true} attributionControl={false}>
@@ -47,7 +104,7 @@ export default function MapView({ places, onSelect }) {
           url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
         />
         <FitToMarkers positions={places} />
-        {places.map(p => (
+        {clustered ? <ServerClusters places={places} onSelect={onSelect} /> : places.map(p => (
           <Marker key={p.id} position={[p.latitude, p.longitude]} eventHandlers={{ click: () => onSelect?.(p) }}>
             <Popup>
               <b>{p.name}</b>
@@ -33,22 +33,59 @@ export async function fetchJSON(path, options = {}) {
   try { return JSON.parse(text) } catch { return null }
 }
 
+// Keyset-paginated lists return the next page's cursor in X-Next-Cursor
+async function fetchPage(path) {
+  const res = await fetch(`${API_BASE}${path}`, { headers: { ...authHeaders() } })
+  if (!res.ok) {
+    const text = await res.text()
+    throw new Error(`API ${res.status}: ${text}`)
+  }
+  return { items: await res.json(), nextCursor: res.headers.get('X-Next-Cursor') }
+}
+
+// Batch reactions endpoints accept up to 500 ids per call
+const REACTIONS_BATCH = 500
+async function fetchReactions(path, ids) {
+  const clientId = getClientId()
+  const out = {}
+  for (let i = 0; i < ids.length; i += REACTIONS_BATCH) {
+    const params = new URLSearchParams({ ids: ids.slice(i, i + REACTIONS_BATCH).join(',') })
+    if (clientId) params.set('client_id', clientId)
+    Object.assign(out, await fetchJSON(`${path}?${params}`))
+  }
+  return out
+}
+
 export const api = {
   listPlaces: () => fetchJSON('/api/places/'),
+  // bbox: [minLon, minLat, maxLon, maxLat]; clusters with counts plus single places
+  getPlaceClusters: (bbox, zoom) => fetchJSON(`/api/places/clusters?bbox=${bbox.join(',')}&zoom=${zoom}`),
   createPlace: (data) => fetchJSON('/api/places/', { method: 'POST', body: JSON.stringify(data) }),
   getPlace: (id) => fetchJSON(`/api/places/${id}`),
   updatePlace: (id, data) => fetchJSON(`/api/places/${id}`, { method: 'PUT', body: JSON.stringify(data) }),
   deletePlace: (id) => fetchJSON(`/api/places/${id}`, { method: 'DELETE' }),
+  // Place, first page of comments, reactions and neighbour ids in one request
+  getPlacePage: (id) => {
+    const clientId = getClientId()
+    const qs = clientId ? `?client_id=${encodeURIComponent(clientId)}` : ''
+    return fetchJSON(`/api/places/${id}/page${qs}`)
+  },
   getPlaceReactions: (id) => {
     const clientId = getClientId()
     const qs = clientId ? `?client_id=${encodeURIComponent(clientId)}` : ''
     return fetchJSON(`/api/places/${id}/reactions${qs}`)
   },
+  getPlacesReactions: (ids) => fetchReactions('/api/places/reactions', ids),
   reactPlace: (id, value) => {
     const clientId = getClientId()
     return fetchJSON(`/api/places/${id}/react`, { method: 'PUT', body: JSON.stringify({ value, client_id: clientId }) })
   },
   listComments: (placeId) => fetchJSON(`/api/comments/place/${placeId}`),
+  listCommentsPage: (placeId, cursor, limit = 20) => {
+    const params = new URLSearchParams({ limit: String(limit) })
+    if (cursor) params.set('cursor', cursor)
+    return fetchPage(`/api/comments/place/${placeId}?${params}`)
+  },
   createComment: (placeId, data) => fetchJSON(`/api/comments/place/${placeId}`, { method: 'POST', body: JSON.stringify(data) }),
   createContact: (data) => fetchJSON('/api/contacts/', { method: 'POST', body: JSON.stringify(data) }),
   // Gallery
@@ -59,6 +96,7 @@ export const api = {
     const qs = clientId ? `?client_id=${encodeURIComponent(clientId)}` : ''
     return fetchJSON(`/api/gallery/${id}/reactions${qs}`)
   },
+  getImagesReactions: (ids) => fetchReactions('/api/gallery/reactions', ids),
   reactImage: (id, value) => {
     const clientId = getClientId()
     return fetchJSON(`/api/gallery/${id}/react`, { method: 'PUT', body: JSON.stringify({ value, client_id: clientId }) })
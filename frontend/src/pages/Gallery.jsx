@@ -17,8 +17,7 @@ export default function Gallery() {
   const load = async () => {
     const data = await api.listGallery()
     setItems(data)
-    const pairs = await Promise.all(data.map(async (it) => [it.id, await api.getImageReactions(it.id)]))
-    setReactions(Object.fromEntries(pairs))
+    setReactions(data.length ? await api.getImagesReactions(data.map(it => it.id)) : {})
   }
 
   useEffect(() => { load() }, [])
@@ -122,7 +121,15 @@ export default function Gallery() {
               </button>
             )}
             <div className="g-thumb">
-              <img src={it.image_url} alt={it.title || 'photo'} />
+              <img
+                src={it.variants?.length ? it.variants[Math.min(1, it.variants.length - 1)].url : it.image_url}
+                srcSet={it.variants?.length ? it.variants.map(v => `${v.url} ${v.width}w`).join(', ') : undefined}
+                sizes="(max-width: 420px) 100vw, (min-width: 1400px) 420px, 360px"
+                loading="lazy"
+                decoding="async"
+                style={it.placeholder ? { backgroundImage: `url(${it.placeholder})`, backgroundSize: 'cover' } : undefined}
+                alt={it.title || 'photo'}
+              />
             </div>
             {it.title && <figcaption className="g-caption">{it.title}</figcaption>}
             <div className="g-actions">
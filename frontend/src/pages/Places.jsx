@@ -5,11 +5,15 @@ import { Link } from 'react-router-dom'
 import { useAuth } from '../context/AuthContext'
 import './Places.css'
 
+// Above this many places the map draws server-side clusters for the viewport
+const CLUSTER_MIN_PLACES = 500
+
 export default function Places() {
   const [places, setPlaces] = useState([])
   const [selected, setSelected] = useState(null)
   const [commentForm, setCommentForm] = useState({ author: '', content: '' })
   const [comments, setComments] = useState([])
+  const [commentsCursor, setCommentsCursor] = useState(null)
   const [loading, setLoading] = useState(true)
   const commentsRef = useRef(null)
   const { user } = useAuth()
@@ -22,17 +26,24 @@ export default function Places() {
     setPlaces(data)
     setLoading(false)
     // load reactions
-    const pairs = await Promise.all(data.map(async (p) => [p.id, await api.getPlaceReactions(p.id)]))
-    const map = Object.fromEntries(pairs)
-    setReactions(map)
+    if (data.length) setReactions(await api.getPlacesReactions(data.map(p => p.id)))
   })() }, [])
 
   useEffect(() => { (async () => {
     if (!selected) return
-    const data = await api.listComments(selected.id)
-    setComments(data)
+    const page = await api.getPlacePage(selected.id)
+    setComments(page.comments)
+    setCommentsCursor(page.comments_next_cursor)
+    setReactions(prev => ({ ...prev, [page.id]: page.reactions }))
   })() }, [selected?.id])
 
+  const loadMoreComments = async () => {
+    if (!selected || !commentsCursor) return
+    const { items, nextCursor } = await api.listCommentsPage(selected.id, commentsCursor)
+    setComments(prev => [...prev, ...items])
+    setCommentsCursor(nextCursor)
+  }
+
   const displayed = useMemo(() => {
     let list = places
     if (query.trim()) {
@@ -83,7 +94,12 @@ export default function Places() {
       <h2>Интересные места</h2>
       {loading ? <p>Загрузка...</p> : (
         <>
-          <MapView places={positions} onSelect={onSelectPlace} />
+          <MapView
+            places={positions}
+            onSelect={onSelectPlace}
+            // Server clusters cover every place, so a filtered list keeps its own markers
+            clustered={!query.trim() && places.length > CLUSTER_MIN_PLACES}
+          />
           <div className="places-controls">
             <input value={query} onChange={e=>setQuery(e.target.value)} placeholder="Поиск по названию или описанию" />
             <select value={sortBy} onChange={e=>setSortBy(e.target.value)}>
@@ -153,6 +169,7 @@ export default function Places() {
                     </div>
                   ))}
                   {comments.length===0 && <div style={{color:'#678'}}>Пока нет комментариев.</div>}
+                  {commentsCursor && <button type="button" onClick={loadMoreComments}>Показать ещё</button>}
                 </div>
               </div>
             )}